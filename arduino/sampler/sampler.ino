@@ -1,46 +1,110 @@
 /*Simple signal Sampler
- * 
+ *
  * Author: Jason Francisco Macas Mora
  * Emai: franciscomacas3@gmail.com
 */
 
+// ----------- SAMPLER MODE -----------
+// 0 -> text lines (one float per line)
+// 1 -> binary frames, see oscilloscope/protocol.py (use Serial(mode="binary"))
+#define BINARY_MODE 0
+
 // ----------- PINS VARIABLES ---------
 const int analogInput1 = A1;
 
 // --------- SAMPLER VARIABLES --------
+#if BINARY_MODE
+unsigned int Fs = 2000; // Sample frequency (Hz)
+const unsigned long SCALE_TIME_FACTOR = 1000000; // 1000 -> ms | 1000000 -> us
+const unsigned long BAUDRATE = 115200;
+#else
 unsigned int Fs = 50; // Sample frequency (Hz)
 const unsigned long SCALE_TIME_FACTOR = 1000; // 1000 -> ms | 1000000 -> us
+const unsigned long BAUDRATE = 9600;
+#endif
 unsigned long dt = SCALE_TIME_FACTOR / Fs; // Sample interval (ms)
-unsigned long t = 0; 
+unsigned long t = 0;
 unsigned long currentTime = 0;
 
 const float voltageScaleFactor = 0.00488; // | Vcc / ADC_resolution | -> 5/1024
 
-// -------- 
+// --------
 float variable = 0;
 
+// -------- BINARY FRAME VARIABLES ----
+// | 0xA5 | 0x5A | seq (uint16, LE) | 8 counts packed on 10 bytes | fletcher-16 |
+const byte FRAME_SAMPLES = 8;
+const byte FRAME_SIZE = 16;
+byte frame[FRAME_SIZE] = {0xA5, 0x5A};
+unsigned int counts[FRAME_SAMPLES];
+byte countIndex = 0;
+unsigned int sequence = 0;
+
 // -------- SAMPLER FUNCTIONS ---------
 
+void sendFrame(){
+  frame[2] = sequence & 0xFF;
+  frame[3] = sequence >> 8;
+
+  // Packs the counts by groups of 4: the low bytes and then their high bits
+  byte *payload = frame + 4;
+  for(byte group = 0; group < FRAME_SAMPLES / 4; group++){
+    byte high = 0;
+    for(byte k = 0; k < 4; k++){
+      unsigned int count = counts[group * 4 + k];
+      payload[group * 5 + k] = count & 0xFF;
+      high |= ((count >> 8) & 0x03) << (2 * k);
+    }
+    payload[group * 5 + 4] = high;
+  }
+
+  // Fletcher-16 over the sequence number and the payload
+  unsigned int sum1 = 0;
+  unsigned int sum2 = 0;
+  for(byte i = 2; i < FRAME_SIZE - 2; i++){
+    sum1 = (sum1 + frame[i]) % 255;
+    sum2 = (sum2 + sum1) % 255;
+  }
+  frame[FRAME_SIZE - 2] = sum1;
+  frame[FRAME_SIZE - 1] = sum2;
+
+  Serial.write(frame, FRAME_SIZE);
+  sequence++;
+}
+
 void sampleSignal(){
-  
+
+#if BINARY_MODE
+  currentTime = micros();
+#else
   // currentTime = micros(); // if you choose scaleTimeFactor = 1ˆ06
   currentTime = millis();
-  
+#endif
+
   if(currentTime - t >= dt){
      t = currentTime;
+
+#if BINARY_MODE
+     counts[countIndex++] = analogRead(analogInput1);
+     if(countIndex == FRAME_SAMPLES){
+       sendFrame();
+       countIndex = 0;
+     }
+#else
      variable = analogRead(analogInput1) * voltageScaleFactor;
-     
+
      // As JSON
-     //Serial.println("{\"x\": " + String(variable) + "}");   
+     //Serial.println("{\"x\": " + String(variable) + "}");
 
      // Normal
      Serial.println(variable);
+#endif
   }
-  
+
 }
 
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(BAUDRATE);
 }
 
 void loop() {
@@ -0,0 +1,277 @@
+"""
+End-to-end acquisition benchmark.
+
+The data goes through the same path as the app: the sampler emulator writes on a
+pty pair -> Serial (chunked or binary mode) -> SampleQueue -> Buffer/MultipleBuffers
+-> the updateGraph data path (min/max decimation and, when pyqtgraph is installed,
+one curve per channel on an offscreen Qt platform). Every configuration reports the sustained
+samples/s, the read and display latency percentiles, the dropped samples and the
+CPU time per sample, the results are written as JSON to compare versions.
+
+Usage (from the repository root):
+    python -m benchmarks.acquisition --rates 1000 10000 50000 --channels 1 4 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from oscilloscope.serialio import Serial
+from oscilloscope.buffer import Buffer, MultipleBuffers
+from oscilloscope.handoff import SampleQueue
+from oscilloscope.decimation import MinMaxDecimator
+from oscilloscope.emulator import SamplerEmulator
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def createGraph(headless: bool = True, pixels: int = 1000):
+    """Returns a Qt app and a plot widget, or (None, None) when pyqtgraph/PyQt5 are not installed.
+
+    Args:
+        headless: use the offscreen Qt platform?
+        pixels: width of the plot.
+    """
+    if headless:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        import pyqtgraph as pg
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None, None
+    app = QApplication.instance() or QApplication(sys.argv)
+    graph = pg.PlotWidget()
+    graph.resize(pixels, 400)
+    return app, graph
+
+
+def summary(values) -> dict:
+    """Returns the percentiles and the max of a list of values (ms)."""
+    if len(values) == 0:
+        return {}
+    values = np.asarray(values) * 1000
+    result = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    result["max"] = float(values.max())
+    return result
+
+
+def gitRevision() -> str:
+    """Returns the current commit of the repository, if any."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+class AcquisitionBenchmark:
+    """Runs the acquisition path for one configuration.
+
+    The emulator has one channel, with more channels the same samples are fanned out
+    to every column, so the buffer and plot costs scale with the channel count. The
+    buffers, decimators and curves are created again on every run.
+
+    Args:
+        rate: sample frequency (Hz).
+        channels: number of channels.
+        mode: 'chunked' (text lines) or 'binary' (sampler binary frames).
+        duration: measurement time (secs).
+        window: plot window (samples).
+        fps: plot frames per second.
+        pixels: width of the plot.
+        graph: pyqtgraph plot widget, every channel is plotted on its own curve (optional).
+        app: Qt app, its events are processed every frame (optional).
+    """
+    def __init__(
+        self,
+        rate: float = 1000,
+        channels: int = 1,
+        mode: str = "chunked",
+        duration: float = 3,
+        window: int = 10000,
+        fps: int = 15,
+        pixels: int = 1000,
+        graph=None,
+        app=None,
+    ):
+        self.rate = rate
+        self.channels = channels
+        self.mode = mode
+        self.duration = duration
+        self.window = window
+        self.fps = fps
+        self.pixels = pixels
+        self.graph = graph
+        self.app = app
+        self.curves = []
+        self.received = 0
+        self.consumed = 0
+        self.readLatency = []
+        self.displayLatency = []
+        self.frameTimes = []
+
+    def setup(self):
+        """Creates the emulator, the serial device and the buffers."""
+        self.emulator = SamplerEmulator(self.rate, binary=self.mode == "binary", blockTime=0.005)
+        self.serial = Serial(
+            port=self.emulator.port,
+            baudrate=1000000,
+            timeout=0.01,
+            reconnectDelay=0.05,
+            emitAsDict=False,
+            mode=self.mode,
+        )
+        self.serial.on("data-block", self.onBlock)
+        self.queue = SampleQueue(capacity=max(65536, int(self.rate)))
+        if self.channels == 1:
+            self.buffer = Buffer(maxlen=self.window, backend="ring")
+        else:
+            variables = [f"ch{i}" for i in range(self.channels)]
+            self.buffer = MultipleBuffers(variables, maxlen=self.window, columnar=True)
+        self.decimators = [MinMaxDecimator(self.window, self.pixels) for _ in range(self.channels)]
+        if self.graph is not None:
+            self.graph.clear()
+            self.curves = [self.graph.plot() for _ in range(self.channels)]
+
+    def onBlock(self, data, *args):
+        """Serial thread: hands the block off to the plot loop."""
+        self.received += len(data)
+        self.queue.put(data)
+        if self.emulator.startTime is not None:
+            self.readLatency.append(self.latency(self.received))
+
+    def latency(self, count: int) -> float:
+        """Returns the time since the last of `count` samples was generated (secs)."""
+        return time.monotonic() - (self.emulator.startTime + count / self.rate)
+
+    def drain(self):
+        """Plot loop: the updateGraph data path of the app."""
+        t0 = time.perf_counter()
+        block = self.queue.get()
+        if len(block) > 0:
+            if self.channels == 1:
+                self.buffer.extend(block)
+            else:
+                self.buffer.appendBlock(np.repeat(block[:, None], self.channels, axis=1))
+            for decimator in self.decimators:
+                decimator.feed(block)
+            self.consumed += len(block)
+
+        for i, decimator in enumerate(self.decimators):
+            x, y = decimator.getData()
+            if len(self.curves) > 0:
+                self.curves[i].setData(x, y)
+        if self.app is not None:
+            self.app.processEvents()
+        if self.buffer.isFull():
+            if self.channels == 1:
+                self.buffer.clear()
+            else:
+                self.buffer.clearAll()
+            for decimator in self.decimators:
+                decimator.clear()
+
+        self.frameTimes.append(time.perf_counter() - t0)
+        if len(block) > 0:
+            self.displayLatency.append(self.latency(self.consumed))
+
+    def run(self) -> dict:
+        """Runs the benchmark and returns its results."""
+        self.setup()
+        self.serial.start()
+        self.emulator.start()
+        period = 1 / self.fps
+        cpu0 = time.process_time()
+        t0 = time.monotonic()
+        nextFrame = t0
+        while time.monotonic() - t0 < self.duration:
+            self.drain()
+            nextFrame += period
+            time.sleep(max(0, nextFrame - time.monotonic()))
+        elapsed = time.monotonic() - t0
+
+        # The samples still in flight are waited for, then the devices are stopped
+        self.emulator.running.clear()
+        self.emulator.thread.join()
+        generated = self.emulator.sent
+        deadline = time.monotonic() + 1
+        while self.consumed < generated and time.monotonic() < deadline:
+            time.sleep(period)
+            self.drain()
+        cpu = time.process_time() - cpu0
+        self.serial.stop()
+        self.emulator.stop()
+
+        errors = self.serial.decoder.errors if self.mode == "binary" else self.serial.parser.errors
+        return {
+            "mode": self.mode,
+            "rate": self.rate,
+            "channels": self.channels,
+            "duration": elapsed,
+            "generated": generated,
+            "consumed": self.consumed,
+            "dropped": max(generated - self.consumed, 0),
+            "queueDropped": self.queue.dropped,
+            "parseErrors": errors,
+            "samplesPerSecond": self.consumed / elapsed,
+            "cpuPerSampleUs": cpu / max(self.consumed, 1) * 1e6,
+            "readLatencyMs": summary(self.readLatency),
+            "displayLatencyMs": summary(self.displayLatency),
+            "frameTimeMs": summary(self.frameTimes),
+            "rendered": len(self.curves) > 0,
+        }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="End-to-end acquisition benchmark.")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1000, 5000, 20000, 50000], help="sample rates (Hz)")
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 4], help="channel counts")
+    parser.add_argument("--modes", nargs="+", default=["chunked", "binary"], choices=["chunked", "binary"])
+    parser.add_argument("--duration", type=float, default=3, help="measurement time per configuration (secs)")
+    parser.add_argument("--window", type=int, default=10000, help="plot window (samples)")
+    parser.add_argument("--fps", type=int, default=15)
+    parser.add_argument("--no-render", action="store_true", help="skip the Qt curve even if it's available")
+    parser.add_argument("--show", action="store_true", help="use the default Qt platform instead of offscreen")
+    parser.add_argument("--output", help="JSON file, by default the results are printed")
+    args = parser.parse_args(argv)
+
+    app, graph = (None, None) if args.no_render else createGraph(headless=not args.show)
+    results = []
+    for mode in args.modes:
+        for channels in args.channels:
+            for rate in args.rates:
+                benchmark = AcquisitionBenchmark(
+                    rate, channels, mode, args.duration, args.window, args.fps, graph=graph, app=app
+                )
+                result = benchmark.run()
+                results.append(result)
+                print(
+                    f"-> {mode:8s} {channels:2d} ch {rate:8.0f} Hz :: {result['samplesPerSecond']:10.0f} samples/s, "
+                    f"dropped {result['dropped']}, display p99 {result['displayLatencyMs'].get('p99', 0):.1f} ms, "
+                    f"{result['cpuPerSampleUs']:.2f} us/sample",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "benchmark": "acquisition",
+        "version": 1,
+        "revision": gitRevision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
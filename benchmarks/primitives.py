@@ -0,0 +1,225 @@
+"""
+Micro-benchmarks of the primitives the acquisition path is built from.
+
+Every case is run for each of its parameter sets and reports the time per
+operation (ns/op, median of the repeats), the peak of the memory allocated by
+one operation and the memory blocks it retains. Every run also times a reference
+operation (an append to a bounded deque), the time of a case relative to it is
+what's stored as a baseline, so the baselines hold across machines of different
+speed. A case whose relative time is over its baseline by more than the
+threshold is reported as a regression (exit code 1).
+
+Usage (from the repository root):
+    python -m benchmarks.primitives --save-baseline     # stores benchmarks/baselines.json
+    python -m benchmarks.primitives --threshold 0.25    # compares with the stored baselines
+    python -m benchmarks.primitives --filter buffer     # only the cases that match
+"""
+import argparse
+import inspect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from collections import deque
+
+import numpy as np
+
+from oscilloscope.buffer import Buffer, MultipleBuffers
+from oscilloscope.sevent import Emitter
+from oscilloscope.utils import magnitudeSpectrum
+
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+CASES = []
+
+
+def case(name: str, **params):
+    """Registers a benchmark case, `params` maps every parameter to the values to be measured.
+
+    The decorated function receives one value of every parameter and returns a
+    (no arguments) function that executes one operation.
+    """
+    def register(setup):
+        keys = list(params)
+        combinations = [{}]
+        for key in keys:
+            combinations = [dict(c, **{key: value}) for c in combinations for value in params[key]]
+        for values in combinations:
+            label = ",".join(f"{key}={value}" for key, value in values.items())
+            CASES.append((f"{name}[{label}]" if label else name, setup, values))
+        return setup
+    return register
+
+
+@case("buffer.append", maxlen=[1000, 100000], backend=["deque", "ring"])
+def bufferAppend(maxlen, backend):
+    buffer = Buffer(maxlen=maxlen, backend=backend)
+    return lambda: buffer.append(1.0)
+
+
+@case("buffer.getData", maxlen=[1000, 100000], backend=["deque", "ring"])
+def bufferGetData(maxlen, backend):
+    buffer = Buffer(maxlen=maxlen, backend=backend)
+    for value in np.random.rand(maxlen + maxlen // 2):
+        buffer.append(value)
+    return buffer.getData
+
+
+@case("multiple.appendAll", channels=[1, 4, 16], columnar=[False, True])
+def multipleAppendAll(channels, columnar):
+    variables = [f"ch{i}" for i in range(channels)]
+    buffers = MultipleBuffers(variables, maxlen=10000, columnar=columnar)
+    row = {key: 1.0 for key in variables}
+    return lambda: buffers.appendAll(row)
+
+
+@case("emitter.emit", listeners=[0, 1, 8])
+def emitterEmit(listeners):
+    emitter = Emitter()
+    for _ in range(listeners):
+        emitter.on("data", lambda data: None)
+    return lambda: emitter.emit("data", 1.0)
+
+
+@case("buffer.save", maxlen=[1000, 100000])
+def bufferSave(maxlen, folder):
+    buffer = Buffer(maxlen=maxlen, backend="ring")
+    buffer.extend(np.random.rand(maxlen))
+    return lambda: buffer.save("save.csv", folder)
+
+
+@case("buffer.load", maxlen=[1000, 100000])
+def bufferLoad(maxlen, folder):
+    buffer = Buffer(maxlen=maxlen, backend="ring")
+    buffer.extend(np.random.rand(maxlen))
+    buffer.save("load.csv", folder)
+    filepath = os.path.join(folder, "load.csv")
+    return lambda: buffer.load(filepath)
+
+
+@case("utils.magnitudeSpectrum", n=[1024, 65536])
+def spectrum(n):
+    x = np.random.rand(n)
+    return lambda: magnitudeSpectrum(x, Fs=1000)
+
+
+def reference():
+    """Returns the reference operation, the cost of a bound C method call from Python."""
+    samples = deque(maxlen=1000)
+    return lambda: samples.append(1.0)
+
+
+def timeOperation(operation, minTime: float = 0.2, repeats: int = 5) -> float:
+    """Returns the median time per operation (ns) over some repeats of a calibrated loop."""
+    number = 1
+    while True:
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter_ns() - t0
+        if elapsed >= minTime * 1e9 / repeats or number >= 1 << 24:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            operation()
+        samples.append((time.perf_counter_ns() - t0) / number)
+    return float(np.median(samples))
+
+
+def measureMemory(operation, number: int = 100) -> dict:
+    """Returns the peak bytes allocated by one operation and the blocks retained per operation."""
+    tracemalloc.start()
+    try:
+        operation()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sys.getallocatedblocks()
+    for _ in range(number):
+        operation()
+    retained = (sys.getallocatedblocks() - blocks) / number
+    return {"peakBytesPerOp": max(peak - current, 0), "retainedBlocksPerOp": retained}
+
+
+def run(pattern: str = None, minTime: float = 0.2) -> dict:
+    """Runs the cases whose name contains `pattern`, returns {name: result}."""
+    results = {}
+    folder = tempfile.mkdtemp()
+    referenceNs = timeOperation(reference(), minTime)
+    print(f"-> {'reference':50s} {referenceNs:14.1f} ns/op", file=sys.stderr)
+    try:
+        for name, setup, values in CASES:
+            if pattern and pattern not in name:
+                continue
+            if "folder" in inspect.signature(setup).parameters:
+                values = dict(values, folder=folder)
+            operation = setup(**values)
+            result = {"nsPerOp": timeOperation(operation, minTime)}
+            result["relative"] = result["nsPerOp"] / referenceNs
+            result.update(measureMemory(operation, number=10 if "save" in name or "load" in name else 100))
+            results[name] = result
+            print(f"-> {name:50s} {result['nsPerOp']:14.1f} ns/op {result['relative']:8.2f}x ref {result['peakBytesPerOp']:10d} B/op", file=sys.stderr)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def compare(results: dict, baselines: dict, threshold: float = 0.25) -> list:
+    """Returns the cases slower than their baseline by more than `threshold` (fraction), relative to the reference."""
+    regressions = []
+    for name, result in results.items():
+        if "relative" not in baselines.get(name, {}):
+            continue
+        ratio = result["relative"] / baselines[name]["relative"]
+        result["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the buffer/emitter primitives.")
+    parser.add_argument("--filter", help="only the cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="measurement time per case (secs)")
+    parser.add_argument("--baselines", default=BASELINES, help="baselines JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="stores the results as the baselines")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before a regression (fraction)")
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.min_time)
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines) as file:
+                baselines = json.load(file)
+        # The absolute times depend on the machine, only the relative ones are stored
+        baselines.update({name: {key: value for key, value in result.items() if key != "nsPerOp"} for name, result in results.items()})
+        with open(args.baselines, "w") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+        return 0
+
+    regressions = []
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+    for name, ratio in regressions:
+        print(f"-> Regression :: {name} is {ratio:.2f}x its baseline", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"results": results, "regressions": [name for name, _ in regressions]}, file, indent=2)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
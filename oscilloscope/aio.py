@@ -0,0 +1,279 @@
+"""
+asyncio interface for the serial devices.
+
+The ports are read from the event loop reader callbacks (no extra thread), every
+readable callback drains the port and queues one block of samples. While the
+queue is above its size the port is not read, so a slow consumer pauses the
+device (the kernel and device buffers fill up) instead of growing the memory.
+It needs a selector based event loop (the default one on Linux/macOS).
+
+    async with AsyncSerial("/dev/ttyACM0", mode="chunked") as device:
+        async for block in device:
+            ...
+"""
+import asyncio
+import json
+import os
+from typing import Union
+
+from serial import Serial as PySerial
+
+from .parsers import createParser
+from .protocol import FrameDecoder, sampleSequence
+
+
+class BlockQueue:
+    """A queue of blocks shared by one or more devices, they stop reading their
+    ports while it has `maxsize` blocks or more.
+
+    Args:
+        maxsize: number of blocks that pauses the devices.
+    """
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.queue = asyncio.Queue()
+        self.paused = set()
+
+    def put(self, source, block):
+        """Queues a block of a device (None marks the end of the device)."""
+        self.queue.put_nowait((source, block))
+        if self.queue.qsize() >= self.maxsize and block is not None:
+            source.pauseReading()
+            self.paused.add(source)
+
+    async def get(self):
+        """Returns the next (device, block), the paused devices are resumed below the size."""
+        item = await self.queue.get()
+        if self.queue.qsize() < self.maxsize and len(self.paused) > 0:
+            for source in self.paused:
+                source.resumeReading()
+            self.paused.clear()
+        return item
+
+
+class AsyncSerial:
+    """A serial device read from the event loop.
+
+    Args:
+        port: port device.
+        name: device name.
+        mode: 'chunked' (blocks of samples from text lines), 'binary' (blocks of
+            samples decoded from the sampler binary frames, with their sequence numbers)
+            or 'csv'/'json' (rows x channels blocks from multi-channel lines).
+        chunkSize: initial size of the read buffer used on chunked/csv/json mode (bytes).
+        channels: names of the channels on csv/json mode.
+        delimiter: delimiter of the columns on csv mode.
+        maxBlocks: number of pending blocks that pauses the reads (backpressure).
+        queue: a BlockQueue shared with other devices, by default its own one.
+        **kwargs: settings of the serial port (baudrate, ...).
+    Iteration:
+        chunked mode yields a numpy array of samples per read, csv/json modes a
+        (rows x channels) array and binary mode a tuple with the samples and the
+        sequence number of every sample.
+    """
+    def __init__(
+        self,
+        port: str,
+        name: str = "default",
+        mode: str = "chunked",
+        chunkSize: int = 4096,
+        channels: list = None,
+        delimiter: str = ",",
+        maxBlocks: int = 64,
+        queue: BlockQueue = None,
+        **kwargs,
+    ):
+        self.port = port
+        self.name = name
+        self.mode = mode
+        self.settings = kwargs
+        self.parser = createParser(mode, channels, delimiter, chunkSize)
+        self.decoder = FrameDecoder()
+        self.queue = queue or BlockQueue(maxBlocks)
+        self.serial = None
+        self.loop = None
+        self.fd = None
+        self.reading = False
+        self.error = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.fd is None and self.queue.queue.empty():
+            raise StopAsyncIteration
+        _, block = await self.queue.get()
+        if block is None:
+            if self.error is not None:
+                raise self.error
+            raise StopAsyncIteration
+        return block
+
+    def isOpen(self):
+        """Checks if the port is open."""
+        return self.fd is not None
+
+    async def open(self):
+        """Opens the port and starts reading it from the event loop."""
+        self.loop = asyncio.get_running_loop()
+        self.serial = PySerial(port=self.port, **self.settings)
+        self.fd = self.serial.fileno()
+        os.set_blocking(self.fd, False)
+        self.error = None
+        self.resumeReading()
+
+    def pauseReading(self):
+        """Stops reading the port (backpressure)."""
+        if self.reading:
+            self.loop.remove_reader(self.fd)
+            self.reading = False
+
+    def resumeReading(self):
+        """Reads the port again."""
+        if not self.reading and self.fd is not None:
+            self.loop.add_reader(self.fd, self.onReadable)
+            self.reading = True
+
+    def readBlock(self):
+        """Drains the available bytes, returns the new block or None."""
+        if self.mode == "binary":
+            raw = os.read(self.fd, max(self.serial.in_waiting, 1))
+            if len(raw) == 0:
+                raise EOFError(f"{self.port} was closed")
+            sequence, samples = self.decoder.feed(raw)
+            if len(samples) > 0:
+                return samples.ravel(), sampleSequence(sequence)
+            return None
+        with self.parser.reserve(self.serial.in_waiting) as view:
+            size = os.readv(self.fd, [view])
+        if size == 0:
+            raise EOFError(f"{self.port} was closed")
+        data = self.parser.commit(size)
+        return data if len(data) > 0 else None
+
+    def onReadable(self):
+        """Reader callback: queues the block completed by the new bytes."""
+        try:
+            block = self.readBlock()
+            if block is not None:
+                self.queue.put(self, block)
+        except BlockingIOError:
+            pass
+        except Exception as e:
+            print(f"-> AsyncSerial - {self.name} :: {e}")
+            self.error = e
+            self.close()
+
+    async def write(self, message: Union[str, dict, bytes] = "", end: str = "\n", asJson: bool = False):
+        """Writes a message to the device, waiting while the port can't take it.
+        Args:
+            message: string (or raw bytes) to be sent.
+            end: newline character to be concated with the message.
+            asJson: convert to JSON?
+        """
+        if asJson:
+            message = json.dumps(message)
+        if isinstance(message, str):
+            message = (message + end).encode()
+        view = memoryview(message)
+        while len(view) > 0:
+            try:
+                n = os.write(self.fd, view)
+                view = view[n:]
+            except BlockingIOError:
+                pass
+            if len(view) > 0:
+                await self.writable()
+
+    async def writable(self):
+        """Waits until the port can be written."""
+        future = self.loop.create_future()
+        self.loop.add_writer(self.fd, lambda: future.done() or future.set_result(None))
+        try:
+            await future
+        finally:
+            self.loop.remove_writer(self.fd)
+
+    def close(self):
+        """Stops reading and closes the port, the iteration ends after the pending blocks."""
+        if self.fd is None:
+            return
+        self.pauseReading()
+        self.fd = None
+        try:
+            self.serial.close()
+        except Exception as e:
+            print(f"-> AsyncSerial - {self.name} :: {e}")
+        self.queue.put(self, None)
+
+
+class AsyncSerials:
+    """Many serial devices consumed from one event loop, on one shared queue.
+
+    Args:
+        devices: dict with the settings of every device (port, mode, baudrate, ...), by name.
+        maxBlocks: number of pending blocks that pauses the reads (backpressure).
+    Iteration:
+        yields a tuple with the device name and its block (see AsyncSerial), the
+        iteration ends when every device is closed.
+    """
+    def __init__(self, devices: dict = {}, maxBlocks: int = 256):
+        self.queue = BlockQueue(maxBlocks)
+        self.devices = {
+            name: AsyncSerial(name=name, queue=self.queue, **settings)
+            for name, settings in devices.items()
+        }
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __getitem__(self, key):
+        return self.devices[key]
+
+    async def __aenter__(self):
+        await self.openAll()
+        return self
+
+    async def __aexit__(self, *args):
+        self.closeAll()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while any(device.isOpen() for device in self.devices.values()) or not self.queue.queue.empty():
+            device, block = await self.queue.get()
+            if block is not None:
+                return device.name, block
+        raise StopAsyncIteration
+
+    async def openAll(self):
+        """Opens every device, a device that can't be opened is reported and skipped."""
+        for device in self.devices.values():
+            try:
+                await device.open()
+            except Exception as e:
+                print(f"-> AsyncSerials :: {e}")
+
+    def closeAll(self):
+        """Closes every device."""
+        for device in self.devices.values():
+            device.close()
+
+    async def writeTo(self, deviceName: str = "default", message: str = "", end: str = "\n", asJson: bool = False):
+        """Writes a message to a specific device.
+        Args:
+            deviceName: name of the serial device.
+            message: message to be written.
+            end: newline character to be concated with the message.
+            asJson: transform message to a json?
+        """
+        if deviceName in self.devices:
+            await self.devices[deviceName].write(message, end, asJson)
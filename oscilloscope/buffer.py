@@ -2,9 +2,108 @@ import time
 import os
 from collections import deque
 import pandas as pd
-# import random
 from .sevent import Emitter
-# import numpy as np
+from .timing import SampleClock
+from .recorder import Recorder
+from .capture import Capture, isCapture
+import numpy as np
+
+
+class RingBuffer:
+    """A circular buffer over a preallocated numpy array.
+
+    :param capacity: max number of samples.
+    :param dtype: type of the samples.
+    :param channels: number of channels, if it is given the array is 2-D (channels x capacity).
+    """
+    def __init__(self, capacity:int=10000, dtype=np.float64, channels:int=None):
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        self.array = np.empty(self.shapeFor(capacity), dtype=self.dtype)
+        self.index = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.toArray())
+
+    def shapeFor(self, capacity:int):
+        """It returns the array shape for a given capacity."""
+        if self.channels is None:
+            return (capacity,)
+        return (self.channels, capacity)
+
+    @property
+    def nbytes(self):
+        """It returns the memory used by the samples."""
+        return self.array.nbytes
+
+    def append(self, value):
+        """It writes a new sample (a column on 2-D buffers), overwriting the oldest one when it is full."""
+        if self.channels is None:
+            self.array[self.index] = value # an Ellipsis index costs twice a scalar one
+        else:
+            self.array[:, self.index] = value
+        self.index += 1
+        if self.index == self.capacity:
+            self.index = 0
+        if self.length < self.capacity:
+            self.length += 1
+
+    def extend(self, values):
+        """It writes a block of samples with at most two slice assignments.
+
+        :param values: list/array with the new samples, (channels x n) on 2-D buffers.
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        n = values.shape[-1]
+        if n >= self.capacity:
+            self.array[...] = values[..., n - self.capacity:]
+            self.index = 0
+            self.length = self.capacity
+            return
+        end = self.index + n
+        if end <= self.capacity:
+            self.array[..., self.index:end] = values
+        else:
+            first = self.capacity - self.index
+            self.array[..., self.index:] = values[..., :first]
+            self.array[..., :n - first] = values[..., first:]
+        self.index = end % self.capacity
+        self.length = min(self.length + n, self.capacity)
+
+    def toArray(self):
+        """It returns the samples in order, as a view while the buffer has not wrapped (one copy otherwise)."""
+        if self.length < self.capacity or self.index == 0:
+            return self.array[..., :self.length]
+        return np.concatenate((self.array[..., self.index:], self.array[..., :self.index]), axis=-1)
+
+    def last(self, n:int):
+        """It returns the last n samples in order."""
+        n = min(n, self.length)
+        if n <= self.index:
+            return self.array[..., self.index - n:self.index]
+        return np.concatenate((self.array[..., self.capacity - (n - self.index):], self.array[..., :self.index]), axis=-1)
+
+    def first(self):
+        """It returns the oldest sample."""
+        return self.array[..., (self.index - self.length) % self.capacity]
+
+    def clear(self):
+        """It discards every sample."""
+        self.index = 0
+        self.length = 0
+
+    def resize(self, capacity:int):
+        """It changes the capacity, keeping the most recent samples."""
+        data = self.last(capacity).copy()
+        self.capacity = capacity
+        self.array = np.empty(self.shapeFor(capacity), dtype=self.dtype)
+        self.clear()
+        self.extend(data)
 
 
 class Buffer(Emitter):
@@ -12,33 +111,63 @@ class Buffer(Emitter):
 
     :param name: name of the buffer/signal
     :param maxlen: signal length
+    :param backend: storage of the samples, 'deque' or 'ring' (preallocated numpy array).
+    :param dtype: type of the samples on the 'ring' backend.
+    :param timing: time source of a timed buffer, 'host' (clock on arrival) or 'index' (sample index / sample rate).
+    :param sampleRate: known sample rate (Hz) on 'index' timing, it is estimated if it is None.
+    :param sequenceModulo: wrap-around of the device sequence counter on 'index' timing.
+
+    Events:
+        is-full: it's emitted with the data when the buffer becomes full (once until it's cleared).
+        dropped: it's emitted with the number of missing samples when a gap in the sequence is detected.
 
     """
-    def __init__(self, name:str="x", maxlen:int=10000, autoclear:bool=False, timed:bool=False, *args, **kwargs):
+    def __init__(self, name:str="x", maxlen:int=10000, autoclear:bool=False, timed:bool=False, backend:str="deque", dtype=np.float64, timing:str="host", sampleRate:float=None, sequenceModulo:int=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         assert name!='t', 'Not valid Name, please Try with someone different of <<t>>'
+        assert backend in ('deque', 'ring'), 'Not valid backend, please Try with <<deque>> or <<ring>>'
         self.name = name
         self.maxlen = maxlen
         self.defaultMaxLen = maxlen
         self.autoclear = autoclear
         self.timed = timed
-        self.data = deque(maxlen=self.maxlen)
+        self.backend = backend
+        self.dtype = dtype
+        self.timing = timing
+        self.clock = SampleClock(sampleRate, sequenceModulo)
+        self.clock.on('dropped', lambda lost: self.emit('dropped', lost))
+        self.recorder = None
+        self.data = self.newStorage(self.maxlen)
+        self.version = 0 # change counter, it's increased by every write/clear
+        self.notifiedFull = False
         self.time = None
         self.initialTime = 0
         self.lastTime = 0
         self.dt = None
         if self.timed:
-            self.time = deque(maxlen=self.maxlen)
+            self.time = self.newStorage(self.maxlen, np.float64)
 
     def __len__(self):
         return len(self.data)
 
+    def newStorage(self, length:int, dtype=None):
+        """It creates an empty storage for the current backend.
+
+        :param length: max number of samples.
+        :param dtype: type of the samples, by default the buffer one.
+        """
+        if self.backend == 'ring':
+            return RingBuffer(length, dtype or self.dtype)
+        return deque(maxlen=length)
+
     def reset(self):
         """It resets the current buffer."""
         self.maxlen = self.defaultMaxLen
-        self.data = deque(maxlen=self.maxlen)
+        self.data = self.newStorage(self.maxlen)
+        self.version += 1
         if self.sampleTimeEnabled():
-            self.time = deque(maxlen=self.maxlen)
+            self.time = self.newStorage(self.maxlen, np.float64)
+            self.clock.restart()
     
     def setNewLen(self, length:int):
         """It updates the length of the buffer.
@@ -46,10 +175,16 @@ class Buffer(Emitter):
         :param length: new value of the length.
         """
         self.maxlen = length
-        self.data = deque(maxlen=length)
+        self.data = self.newStorage(length)
+        self.version += 1
+        if self.sampleTimeEnabled():
+            self.time = self.newStorage(length, np.float64)
+            self.clock.restart()
 
     def getSampleInterval(self):
         """It returns the sample time interval on secs."""
+        if self.timing == 'index':
+            return self.clock.interval()
         if self.dt is not None:
             return self.dt
         else:
@@ -65,7 +200,7 @@ class Buffer(Emitter):
 
     def isFull(self):
         """It checks if the buffer is full."""
-        return len(self.data) == self.maxlen - 1
+        return len(self.data) >= self.maxlen - 1
  
     def sampleTimeEnabled(self):
         """It checks if the sample time is enabled."""
@@ -77,16 +212,26 @@ class Buffer(Emitter):
         :param timeToo: clear the variable buffer too.
         """
         self.data.clear()
+        self.version += 1
         if timeToo:
             if self.time is not None:
                 self.time.clear()
+                self.clock.restart()
 
     def getData(self):
         """It returns the current data."""
+        if self.backend == 'ring':
+            return self.data.toArray()
         return self.data
 
     def getTime(self):
         """It returns the current time vector."""
+        if self.time is None:
+            return None
+        if self.timing == 'index':
+            return self.clock.seconds(self.time.toArray() if self.backend == 'ring' else self.time)
+        if self.backend == 'ring':
+            return self.time.toArray()
         return self.time
 
     def getDataAndTime(self):
@@ -97,7 +242,9 @@ class Buffer(Emitter):
     def sampleTime(self):
         """It samples time if the buffers needs it."""
         if self.sampleTimeEnabled():
-            if len(self.time) == 0:
+            if self.timing == 'index':
+                self.time.append(self.clock.nextIndex())
+            elif len(self.time) == 0:
                 self.initialTime = time.time()
                 self.time.append(0)
             else:
@@ -107,18 +254,46 @@ class Buffer(Emitter):
                 self.dt = dt
                 self.lastTime = currentTime
                 self.time.append(elapsedTime)
+
+    def sampleTimes(self, n:int, sequence=None):
+        """It samples time for a block of n values. On 'host' timing they are spread evenly since
+        the last sample, on 'index' timing the sample indexes are stored.
+
+        :param n: number of values of the block.
+        :param sequence: per-sample sequence numbers of the device ('index' timing).
+        """
+        if not self.sampleTimeEnabled() or n == 0:
+            return
+        if self.timing == 'index':
+            self.time.extend(self.clock.indices(n, sequence))
+        else:
+            currentTime = time.time()
+            if len(self.time) == 0:
+                self.initialTime = currentTime
+                self.lastTime = currentTime
+            elapsed = np.linspace(self.lastTime, currentTime, n + 1)[1:] - self.initialTime
+            self.dt = (currentTime - self.lastTime) / n
+            self.lastTime = currentTime
+            self.time.extend(elapsed)
     
     def notifyIsFull(self):
-        """If the buffer is full it will emit an event signal."""
-        if self.isFull():
-            t0 = time.time()
-            self.emit('is-full', self.data)
-            t1 = time.time()
-            print(t1 - t0)
+        """If the buffer has just become full it will emit an event signal.
+
+        A block can skip the exact full length, so the state is checked with isFull (>=)
+        and only the transition to full is notified.
+        """
+        full = self.isFull()
+        if full and not self.notifiedFull:
+            if self.hasListeners('is-full'):
+                self.emit('is-full', self.getData())
             if self.autoclear:
                 self.data.clear()
+                self.version += 1
                 if self.time is not None:
                     self.time.clear()
+                    self.clock.restart()
+                full = False
+        self.notifiedFull = full
 
     def append(self, value):
         """It appends a new value to the data list/deque.
@@ -126,9 +301,45 @@ class Buffer(Emitter):
         :param value: new value to add to the data.
         """
         self.data.append(value)
+        self.version += 1
         self.sampleTime()
+        if self.recorder is not None:
+            self.recorder.write([value])
         self.notifyIsFull()
 
+    def extend(self, values, sequence=None):
+        """It appends a block of values to the data list/deque.
+
+        :param values: list/array with the new values.
+        :param sequence: per-sample sequence numbers of the device, used by the 'index' timing.
+        """
+        self.data.extend(values)
+        self.version += 1
+        self.sampleTimes(len(values), sequence)
+        if self.recorder is not None:
+            self.recorder.write(values)
+        self.notifyIsFull()
+
+    def startRecording(self, filepath:str, sampleRate:float=None, **kwargs):
+        """It starts streaming every new value to a binary capture file (see recorder.Recorder).
+
+        :param filepath: capture file.
+        :param sampleRate: sample frequency stored on the file header.
+        """
+        self.stopRecording()
+        self.recorder = Recorder(filepath, [self.name], sampleRate=sampleRate or self.clock.sampleRate, **kwargs)
+        self.recorder.start()
+
+    def stopRecording(self):
+        """It stops the current recording, writing the pending values."""
+        if self.recorder is not None:
+            self.recorder.stop()
+            self.recorder = None
+
+    def isRecording(self):
+        """It checks if the values are being recorded."""
+        return self.recorder is not None
+
     def save(self, filename:str, folder:str):
         """It saves as csv the current data.
 
@@ -136,7 +347,7 @@ class Buffer(Emitter):
         :param folder: name of the folder.
         """
         try:
-            data = {self.name: self.data}
+            data = {self.name: self.getData()}
             df = pd.DataFrame(data)
             filepath = os.path.join(folder, filename)
             df.to_csv(filepath)
@@ -148,15 +359,25 @@ class Buffer(Emitter):
         
         :param data: new data to update the internal data list/deque
         """
-        self.data = deque(data)
+        if self.backend == 'ring':
+            self.data = RingBuffer(max(len(data), self.maxlen), self.dtype)
+            self.data.extend(data)
+        else:
+            self.data = deque(data)
+        self.version += 1
         if len(data) < self.maxlen:
             self.maxlen = self.defaultMaxLen
 
     def load(self, filepath:str):
-        """It loads data from a csv file.
+        """It loads data from a csv or a binary capture file.
         
         :param filepath: file directory.
         """
+        if isCapture(filepath):
+            with Capture(filepath) as capture:
+                data = capture.channel(self.name)[:].copy()
+            self.fill(data)
+            return
         df = pd.read_csv(filepath, index_col=0)
         data = df[self.name].values
         self.fill(data)
@@ -168,50 +389,88 @@ class MultipleBuffers(Emitter):
     :param variables: a list with the name of the variables to create a buffer.
     :param timed: sample time?
     :param maxlen: maximum length of each buffer created.
+    :param columnar: store all variables on one 2-D ring buffer (variables x maxlen) with a shared time column?
+    :param dtype: type of the samples on columnar mode.
+    :param timing: time source, 'host' (clock on arrival) or 'index' (sample index / sample rate).
+    :param sampleRate: known sample rate (Hz) on 'index' timing, it is estimated if it is None.
+    :param sequenceModulo: wrap-around of the device sequence counter on 'index' timing.
+
+    Events:
+        dropped: it's emitted with the number of missing rows when a gap in the sequence is detected.
     """
-    def __init__(self, variables:list=['x'], timed:bool=False, maxlen:bool=10000, *args, **kwargs):
+    def __init__(self, variables:list=['x'], timed:bool=False, maxlen:bool=10000, columnar:bool=False, dtype=np.float64, timing:str="host", sampleRate:float=None, sequenceModulo:int=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.timing = timing
+        self.clock = SampleClock(sampleRate, sequenceModulo)
+        self.clock.on('dropped', lambda lost: self.emit('dropped', lost))
+        self.recorder = None
         self.variables = {}
+        self.columns = {}
+        self.columnar = columnar
+        self.dtype = dtype
+        self.store = None
+        self.version = 0 # change counter, it's increased by every write/clear
         self.mainKey = ""
         for i in range(len(variables)): 
             key = variables[i]
             if i == 0:
                 self.mainKey = key
-            buffer = Buffer(name=key, timed=False, maxlen=maxlen, *args, **kwargs)
-            self.variables[key] = buffer
+            if self.columnar:
+                self.columns[key] = i
+            else:
+                buffer = Buffer(name=key, timed=False, maxlen=maxlen, *args, **kwargs)
+                self.variables[key] = buffer
 
         self.defaultMaxLen = maxlen   
         self.maxlen = maxlen
+        if self.columnar:
+            self.store = RingBuffer(self.maxlen, self.dtype, channels=len(self.columns))
         self.timed = timed
         self.time = None
         self.dt = None
         if self.timed:
-            self.time = deque(maxlen=self.maxlen)
+            self.time = self.newTimeStorage()
 
         self.initialTime = 0
         self.lastTime = 0
     
     def __getitem__(self, key):
+        if self.columnar:
+            return self.getDataOf(key)
         return self.variables[key]
     
     def __len__(self):
-        return len(self.variables)
+        return len(self.keys())
     
     def keys(self):
+        if self.columnar:
+            return self.columns.keys()
         return self.variables.keys()
 
     def values(self):
+        if self.columnar:
+            return self.getDataOfAll().values()
         return self.variables.values()
 
+    def newTimeStorage(self):
+        """It creates an empty storage for the time vector."""
+        if self.columnar:
+            return RingBuffer(self.maxlen, np.float64)
+        return deque(maxlen=self.maxlen)
+
     def resetAll(self):
         """It resets all buffers."""
         for buffer in self.variables.values():
             buffer.reset()
         self.maxlen = self.defaultMaxLen
+        self.version += 1
+        if self.columnar:
+            self.store = RingBuffer(self.maxlen, self.dtype, channels=len(self.columns))
         if self.sampleTimeEnabled():
-            self.time = deque(maxlen=self.maxlen)
+            self.time = self.newTimeStorage()
             self.lastTime = 0
             self.dt = 0
+            self.clock.restart()
 
     def sampleTimeEnabled(self):
         """It checks if the sample time is enabled."""
@@ -219,6 +478,8 @@ class MultipleBuffers(Emitter):
 
     def getSampleInterval(self):
         """It returns the sample time interval on secs."""
+        if self.timing == 'index':
+            return self.clock.interval()
         if self.dt is not None:
             return self.dt
         else:
@@ -235,7 +496,9 @@ class MultipleBuffers(Emitter):
     def sampleTime(self):
         """It samples the time of recording."""
         if self.sampleTimeEnabled():
-            if len(self.time) == 0:
+            if self.timing == 'index':
+                self.time.append(self.clock.nextIndex())
+            elif len(self.time) == 0:
                 self.initialTime = time.time()
                 self.lastTime = self.initialTime
                 self.time.append(0)
@@ -248,11 +511,43 @@ class MultipleBuffers(Emitter):
                 elapsedTime = currentTime - self.initialTime
                 self.time.append(elapsedTime)
 
+    def sampleTimes(self, n:int, sequence=None):
+        """It samples the time of a block of n rows. On 'host' timing they are spread evenly since
+        the last row, on 'index' timing the row indexes are stored.
+
+        :param n: number of rows of the block.
+        :param sequence: per-row sequence numbers of the device ('index' timing).
+        """
+        if not self.sampleTimeEnabled() or n == 0:
+            return
+        if self.timing == 'index':
+            self.time.extend(self.clock.indices(n, sequence))
+        else:
+            currentTime = time.time()
+            if len(self.time) == 0:
+                self.initialTime = currentTime
+                self.lastTime = currentTime
+            elapsed = np.linspace(self.lastTime, currentTime, n + 1)[1:] - self.initialTime
+            self.dt = (currentTime - self.lastTime) / n
+            self.lastTime = currentTime
+            self.time.extend(elapsed)
+
     def appendAll(self, data:dict):
         """It appends multiple variables values at the same time passing a dictinary with the keys/names and the corresponding values.
         
         :param data: a dictinary with new variables values.
         """
+        if self.columnar:
+            try:
+                row = [data[key] for key in self.columns]
+                self.store.append(row)
+                self.version += 1
+                self.sampleTime()
+                if self.recorder is not None:
+                    self.recorder.write(row)
+            except KeyError as e:
+                print(e)
+            return
         error = False
         for key, value in data.items():
             try:
@@ -260,36 +555,121 @@ class MultipleBuffers(Emitter):
             except KeyError as e:
                 error = True
                 print(e)
+        self.version += 1
         if not error:
             self.sampleTime()
+            if self.recorder is not None:
+                self.recorder.write([data.get(key) for key in self.keys()])
+
+    def appendBlock(self, block, sequence=None):
+        """It appends a block of rows for all variables at once.
+
+        :param block: a (rows x variables) array, with the variables in the declared order, or a dictionary with an array per variable.
+        :param sequence: per-row sequence numbers of the device, used by the 'index' timing.
+        """
+        if isinstance(block, dict):
+            try:
+                block = np.column_stack([block[key] for key in self.keys()])
+            except KeyError as e:
+                print(e)
+                return
+        block = np.asarray(block)
+        if self.columnar:
+            self.store.extend(block.T)
+        else:
+            for i, buffer in enumerate(self.variables.values()):
+                buffer.extend(block[:, i])
+        self.version += 1
+        self.sampleTimes(len(block), sequence)
+        if self.recorder is not None:
+            self.recorder.write(block)
+
+    def startRecording(self, filepath:str, sampleRate:float=None, **kwargs):
+        """It starts streaming every new row to a binary capture file (see recorder.Recorder).
+
+        :param filepath: capture file.
+        :param sampleRate: sample frequency stored on the file header.
+        """
+        self.stopRecording()
+        self.recorder = Recorder(filepath, list(self.keys()), sampleRate=sampleRate or self.clock.sampleRate, **kwargs)
+        self.recorder.start()
+
+    def stopRecording(self):
+        """It stops the current recording, writing the pending rows."""
+        if self.recorder is not None:
+            self.recorder.stop()
+            self.recorder = None
+
+    def isRecording(self):
+        """It checks if the rows are being recorded."""
+        return self.recorder is not None
 
     def lenOf(self, key):
         """It returns the len of."""
-        if key in self.variables:
+        if self.columnar:
+            if key in self.columns:
+                return len(self.store)
+        elif key in self.variables:
             return len(self.variables[key])
 
     def appendTo(self, key:str, value):
-        """It appends a new value to a specific variable buffer."""
+        """It appends a new value to a specific variable buffer (not available on columnar mode)."""
+        if self.columnar:
+            print(f"{key} :: appendTo is not available on columnar mode, use appendAll")
+            return
         if key in self.variables:
             self.variables[key].append(value)
+            self.version += 1
 
             if self.sampleTimeEnabled():
                 self.sampleTime()
 
     def clearAll(self):
         """It clears every variable buffer."""
+        self.version += 1
+        if self.columnar:
+            self.store.clear()
+        if self.time is not None:
+            self.time.clear()
+            self.clock.restart()
         for buffer in self.variables.values():
             buffer.clear()
     
     def getDataOfAll(self):
         """It returns a dictionary with all data saved so far."""
         data = {}
+        if self.columnar:
+            columns = self.store.toArray()
+            for key, index in self.columns.items():
+                data[key] = columns[index]
+            return data
         for key in self.variables:
             data[key] = self.variables[key].getData()
         return data
 
+    def getArray(self):
+        """It returns one snapshot of all variables as a (variables x samples) array, in the declared order.
+
+        On columnar mode it is a single read of the 2-D ring buffer (a view until it wraps).
+        """
+        if self.columnar:
+            return self.store.toArray()
+        return np.vstack([buffer.getData() for buffer in self.variables.values()])
+
+    def isFull(self):
+        """It checks if the buffers are full (same threshold as Buffer.isFull)."""
+        if self.columnar:
+            return len(self.store) >= self.maxlen - 1
+        return all(buffer.isFull() for buffer in self.variables.values())
+
     def getTime(self):
         """It returns the current time vector."""
+        if self.time is None:
+            return None
+        if self.timing == 'index':
+            return self.clock.seconds(self.time.toArray() if self.columnar else self.time)
+        if self.columnar:
+            return self.time.toArray()
         return self.time
 
     def getDataAndTime(self):
@@ -300,7 +680,10 @@ class MultipleBuffers(Emitter):
 
     def getDataOf(self, key:str):
         """It returns the data of a specific buffer/variable."""
-        if key in self.variables:
+        if self.columnar:
+            if key in self.columns:
+                return self.store.toArray()[self.columns[key]]
+        elif key in self.variables:
             return self.variables[key].getData()
 
     def saveAll(self, name="default.csv"):
@@ -313,22 +696,48 @@ class MultipleBuffers(Emitter):
         df.to_csv(name)
     
     def load(self, filepath:str):
-        """It loads all variables contained on one single CSV file."""
+        """It loads all variables contained on one single CSV file or binary capture file."""
         try:
-            df = pd.read_csv(filepath, index_col=0)
+            if isCapture(filepath):
+                with Capture(filepath) as capture:
+                    df = capture.toDataFrame()
+            else:
+                df = pd.read_csv(filepath, index_col=0)
             columns = df.columns.values
+            self.version += 1
+            if self.columnar:
+                self.loadColumns(df)
+                return
             self.variables = {}
             for column in columns:
                 data = df[column].values
+                if column == 't':
+                    self.time = deque(data)
+                    continue
                 buffer = Buffer(name=column)
                 buffer.fill(data)
                 self.variables[column] = buffer
         except Exception as e:
             print(e)
 
+    def loadColumns(self, df:pd.DataFrame):
+        """It fills the columnar storage with a dataframe, the <<t>> column is taken as the time vector."""
+        keys = [column for column in df.columns.values if column != 't']
+        self.columns = {key: i for i, key in enumerate(keys)}
+        self.maxlen = max(len(df), self.defaultMaxLen)
+        self.store = RingBuffer(self.maxlen, self.dtype, channels=len(keys))
+        self.store.extend(df[keys].values.T)
+        if 't' in df.columns:
+            self.time = RingBuffer(self.maxlen, np.float64)
+            self.time.extend(df['t'].values)
+
     def saveOnly(self, key:str, filepath:str, name:str):
         """It saves the data of only one buffer/variable."""
-        if key in self.variables:
+        if self.columnar:
+            if key in self.columns:
+                df = pd.DataFrame({key: self.getDataOf(key)})
+                df.to_csv(os.path.join(name, filepath))
+        elif key in self.variables:
             self.variables[key].save(filepath, name)
     
     def infoLen(self):
@@ -336,6 +745,8 @@ class MultipleBuffers(Emitter):
         print(" __________ SHOWING LEN INFO _____________")
         for buffer in self.variables.values():
             print(f"{buffer.name} : ", len(buffer))
+        for key in self.columns:
+            print(f"{key} : ", len(self.store))
 
         if self.sampleTimeEnabled():
             print('time: ', len(self.time))
@@ -348,31 +759,10 @@ class MultipleBuffers(Emitter):
     def setNewLen(self, length:int):
         """It sets a new length for all buffers."""
         self.maxlen = length
-        self.time = deque(maxlen=self.maxlen)
+        self.version += 1
+        self.time = self.newTimeStorage()
+        self.clock.restart()
+        if self.columnar:
+            self.store = RingBuffer(length, self.dtype, channels=len(self.columns))
         for buffer in self.variables.values():
             buffer.setNewLen(length)
-
-# Fs = 500
-# T = 1 / Fs
-# L = 1000
-# N = 1000
-# v = ['x', 'y', 'z', 'w']
-# b = MultipleBuffers(variables=v, timed=True, autoclear=True, maxlen=L)
-# print(T)
-
-# for i in range(N):  
-#     data = {k:random.randint(1, 10) for k in v}
-#     t0 = time.time()
-#     b.appendAll(data)
-#     time.sleep(T)
-#     t1 = time.time()
-#     dt = t1 - t0
-#     # print('Fs: ', b.getSampleFrequency(), " || ", b.getSampleInterval())
-
-# data = b.getDataAndTime()
-# t = data['t']
-# dtv = np.diff(t)
-# dt = np.mean(dtv)
-# print('')
-# print('dt: ', dt)
-# print('Fs: ', 1 / dt)
\ No newline at end of file
@@ -0,0 +1,209 @@
+import json
+import mmap
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .recorder import (
+    CHUNK_HEADER,
+    CHUNK_MAGIC,
+    MAGIC,
+    encodeChunk,
+    encodeHeader,
+    padding,
+)
+
+
+def isCapture(filepath: str) -> bool:
+    """Checks if a file is a binary capture (see recorder.py)."""
+    with open(filepath, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class ChannelView:
+    """A lazy view of one channel of a capture, it supports len() and int/slice indexing."""
+    def __init__(self, capture, column: int):
+        self.capture = capture
+        self.column = column
+
+    def __len__(self):
+        return len(self.capture)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            return self.capture.read(start, stop, [self.column])[::step, 0]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("capture index out of range")
+        return self.capture.read(key, key + 1, [self.column])[0, 0]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:]
+        return data if dtype is None else data.astype(dtype)
+
+
+class Capture:
+    """A capture file opened with a memory map.
+
+    Only the chunk headers are read when it is opened, they make a sparse index of
+    rows (and time, with the sample rate), the samples are paged in when a range is
+    read. A range inside one chunk is a view of the map, no copy is made. The crc32
+    of the trailing chunks is checked, so the chunks left zero-filled or partially
+    written by a crash are not served as samples.
+
+    Args:
+        filepath: capture file.
+        verify: check the crc32 of every chunk (it reads the whole file), the index stops at the first mismatch.
+    """
+    def __init__(self, filepath: str, verify: bool = False):
+        self.filepath = filepath
+        self.file = open(filepath, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.readHeader()
+        self.readIndex(verify)
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def __getitem__(self, key: str):
+        return self.channel(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def readHeader(self):
+        """Reads the file header."""
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not valid capture file: {self.filepath}")
+        size = struct.unpack_from("<I", self.map, len(MAGIC))[0]
+        begin = len(MAGIC) + 4
+        header = json.loads(self.map[begin:begin + size])
+        self.channels = header["channels"]
+        self.dtype = np.dtype(header["dtype"])
+        self.sampleRate = header["sampleRate"]
+        self.startTime = header["startTime"]
+        self.dataOffset = begin + size + padding(begin + size)
+        self.rowSize = self.dtype.itemsize * len(self.channels)
+
+    def readIndex(self, verify: bool = False):
+        """Reads the chunk headers, a truncated or corrupted last chunk (e.g. after a crash) is ignored.
+
+        Args:
+            verify: check the crc32 of every chunk instead of the trailing ones only.
+        """
+        offsets = []
+        rows = []
+        crcs = []
+        position = self.dataOffset
+        end = len(self.map)
+        while position + CHUNK_HEADER.size <= end:
+            magic, count, crc, _ = CHUNK_HEADER.unpack_from(self.map, position)
+            size = count * self.rowSize
+            if magic != CHUNK_MAGIC or position + CHUNK_HEADER.size + size > end:
+                break
+            offsets.append(position + CHUNK_HEADER.size)
+            rows.append(count)
+            crcs.append(crc)
+            position += CHUNK_HEADER.size + size + padding(size)
+        chunks = list(zip(offsets, rows, crcs))
+        if verify:
+            last = next((i for i, chunk in enumerate(chunks) if not self.checkChunk(*chunk)), len(chunks))
+        else:
+            last = len(chunks)
+            while last > 0 and not self.checkChunk(*chunks[last - 1]):
+                last -= 1
+        offsets, rows = offsets[:last], rows[:last]
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(rows, dtype=np.int64)))
+
+    def checkChunk(self, offset: int, count: int, crc: int) -> bool:
+        """Checks the samples of a chunk against its crc32."""
+        return zlib.crc32(self.map[offset:offset + count * self.rowSize]) == crc
+
+    def chunk(self, i: int) -> np.ndarray:
+        """Returns the (rows x channels) view of a chunk."""
+        count = int(self.starts[i + 1] - self.starts[i])
+        data = np.frombuffer(self.map, self.dtype, count * len(self.channels), int(self.offsets[i]))
+        return data.reshape(count, len(self.channels))
+
+    def read(self, start: int = 0, stop: int = None, columns: list = None) -> np.ndarray:
+        """Returns the (rows x channels) samples of a range of rows.
+
+        Args:
+            start: first row.
+            stop: row after the last one, by default the end.
+            columns: indexes of the channels, by default all of them.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = max(start, 0)
+        if stop <= start:
+            return np.empty((0, len(columns or self.channels)), dtype=self.dtype)
+        first = int(np.searchsorted(self.starts, start, side="right")) - 1
+        last = int(np.searchsorted(self.starts, stop, side="left")) - 1
+        parts = []
+        for i in range(first, last + 1):
+            begin = max(start - self.starts[i], 0)
+            end = min(stop, self.starts[i + 1]) - self.starts[i]
+            part = self.chunk(i)[begin:end]
+            parts.append(part if columns is None else part[:, columns])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def channel(self, name: str) -> ChannelView:
+        """Returns a lazy view of a channel."""
+        return ChannelView(self, self.channels.index(name))
+
+    def rowAt(self, t: float) -> int:
+        """Returns the row of a time (secs since the start), it needs the sample rate."""
+        if not self.sampleRate:
+            raise ValueError("The capture has no sample rate")
+        return int(round(t * self.sampleRate))
+
+    def readTime(self, t0: float, t1: float, columns: list = None) -> np.ndarray:
+        """Returns the samples between two times (secs since the start)."""
+        return self.read(self.rowAt(t0), self.rowAt(t1), columns)
+
+    def time(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Returns the time vector (secs since the start) of a range of rows."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        return np.arange(start, stop) / (self.sampleRate or 1)
+
+    def toDataFrame(self) -> pd.DataFrame:
+        """Loads (copies) the whole capture on a dataframe."""
+        return pd.DataFrame(self.read().copy(), columns=self.channels)
+
+    def close(self):
+        """Closes the memory map and the file, the views must be released before."""
+        self.map.close()
+        self.file.close()
+
+
+def convertCsv(csvpath: str, filepath: str, dtype=np.float32, chunkRows: int = 65536, sampleRate: float = None):
+    """Converts a legacy CSV (Buffer.save/MultipleBuffers.saveAll) to a capture file, by chunks.
+
+    The <<t>> column is kept as a channel and, when the sample rate is not given,
+    it is estimated from it.
+
+    Args:
+        csvpath: CSV file.
+        filepath: capture file to be written.
+        dtype: type of the samples.
+        chunkRows: rows per chunk.
+        sampleRate: sample frequency (Hz).
+    """
+    reader = pd.read_csv(csvpath, index_col=0, chunksize=chunkRows)
+    with open(filepath, "wb") as file:
+        for i, df in enumerate(reader):
+            if i == 0:
+                if sampleRate is None and "t" in df.columns and len(df) > 1:
+                    dt = np.median(np.diff(df["t"].values))
+                    sampleRate = 1 / dt if dt > 0 else None
+                file.write(encodeHeader(df.columns.values, dtype, sampleRate))
+            rows = np.ascontiguousarray(df.values, dtype=np.dtype(dtype).newbyteorder("<"))
+            file.write(encodeChunk(rows))
@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+
+from .buffer import RingBuffer
+
+
+def minMaxReduce(y: np.ndarray, size: int, offset: int = 0):
+    """Reduces every group of `size` samples to its min and max, in time order.
+
+    Args:
+        y: samples, its length must be a multiple of size.
+        size: samples per group.
+        offset: index of the first sample.
+    Returns:
+        a (4 x groups) array with the index and value of the first and the second extreme.
+    """
+    groups = y.reshape(-1, size)
+    rows = np.arange(len(groups))
+    low = groups.argmin(axis=1)
+    high = groups.argmax(axis=1)
+    first = np.minimum(low, high)
+    second = np.maximum(low, high)
+    start = offset + rows * size
+    return np.stack([
+        start + first,
+        groups[rows, first],
+        start + second,
+        groups[rows, second],
+    ])
+
+
+def interleave(points: np.ndarray):
+    """Converts a (4 x groups) array of extremes to x, y vectors."""
+    x = points[[0, 2]].T.ravel()
+    y = points[[1, 3]].T.ravel()
+    return x, y
+
+
+def minMax(y, pixels: int = 1000):
+    """Peak-preserving decimation to about 2 points per pixel.
+
+    Args:
+        y: samples.
+        pixels: horizontal pixels of the plot.
+    Returns:
+        the x (sample indexes) and y vectors.
+    """
+    y = np.asarray(y)
+    n = len(y)
+    if n <= 2 * pixels:
+        return np.arange(n), y
+    size = math.ceil(n / pixels)
+    full = n - n % size
+    points = minMaxReduce(y[:full], size)
+    if full < n:
+        rest = minMaxReduce(y[full:], n - full, full)
+        points = np.concatenate((points, rest), axis=1)
+    return interleave(points)
+
+
+def lttb(y, threshold: int = 2000, x=None):
+    """Largest-Triangle-Three-Buckets decimation, it keeps the visual shape with `threshold` points.
+
+    Args:
+        y: samples.
+        threshold: number of points to keep.
+        x: x vector, by default the sample indexes.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # Bucket limits (the first and the last points are always kept) and their averages
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    counts = np.diff(edges)
+    meanX = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    meanY = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    meanX = np.append(meanX[1:], x[-1])
+    meanY = np.append(meanY[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        begin, end = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - meanX[i]) * (y[begin:end] - y[a])
+            - (x[a] - x[begin:end]) * (meanY[i] - y[a])
+        )
+        a = begin + int(area.argmax())
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+
+def decimate(y, pixels: int = 1000, method: str = "minmax"):
+    """Reduces a signal for plotting with the given method ('minmax' or 'lttb')."""
+    if method == "lttb":
+        return lttb(y, 2 * pixels)
+    return minMax(y, pixels)
+
+
+class MinMaxDecimator:
+    """Incremental min/max decimation of a rolling window.
+
+    Only the new complete groups of samples are reduced on every block, the
+    extremes are kept on a ring buffer, so the cost per frame depends on the
+    plot width and not on the window length.
+
+    Args:
+        window: window length (samples).
+        pixels: horizontal pixels of the plot.
+    """
+    def __init__(self, window: int = 10000, pixels: int = 1000):
+        self.setWindow(window, pixels)
+
+    def setWindow(self, window: int, pixels: int = None):
+        """Updates the window length and/or the plot width, discarding the current points."""
+        self.window = window
+        self.pixels = pixels or self.pixels
+        self.size = max(1, math.ceil(window / self.pixels))
+        self.points = RingBuffer(math.ceil(window / self.size), channels=4)
+        self.clear()
+
+    def clear(self):
+        """Discards every point."""
+        self.points.clear()
+        self.partial = np.empty(0)
+        self.count = 0
+
+    def feed(self, block):
+        """Reduces the new complete groups of samples.
+
+        Args:
+            block: list/array with the new samples.
+        """
+        data = np.concatenate((self.partial, np.asarray(block, dtype=np.float64)))
+        full = len(data) - len(data) % self.size
+        if full > 0:
+            self.points.extend(minMaxReduce(data[:full], self.size, self.count))
+            self.count += full
+        self.partial = data[full:]
+
+    def getData(self):
+        """Returns the x (sample indexes from the window start) and y vectors."""
+        points = self.points.toArray()
+        if len(self.partial) > 0:
+            rest = minMaxReduce(self.partial, len(self.partial), self.count)
+            points = np.concatenate((points, rest), axis=1)
+        x, y = interleave(points)
+        if len(x) > 0:
+            x = x - (self.count + len(self.partial) - min(self.window, self.count + len(self.partial)))
+        return x, y
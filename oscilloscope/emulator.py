@@ -0,0 +1,94 @@
+import os
+import select
+import time
+import tty
+from threading import Thread, Event
+
+import numpy as np
+
+from .protocol import ADC_SCALE, FRAME_SAMPLES, SEQUENCE_MODULO, encodeFrames
+
+
+class SamplerEmulator:
+    """Emulates `arduino/sampler/sampler.ino` behind a pty pair (Linux/macOS),
+    so the `Serial` read path can be exercised without a board.
+
+    Args:
+        rate: sample frequency (Hz).
+        binary: send binary frames (BINARY_MODE) instead of text lines?
+        signal: function of the time vector (secs) that returns the voltages.
+        blockTime: time between writes to the pty (secs).
+        source: object with a read(n) method that returns the next n voltages
+            (see virtual.py), it replaces the signal.
+    """
+    def __init__(self, rate: float = 1000, binary: bool = False, signal=None, blockTime: float = 0.01, source=None):
+        self.rate = rate
+        self.source = source
+        self.binary = binary
+        self.signal = signal
+        if self.signal is None:
+            self.signal = lambda t: 2.5 + 2 * np.sin(2 * np.pi * 5 * t)
+        self.blockTime = blockTime
+        self.sent = 0
+        self.startTime = None
+        self.sequence = 0
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.thread = Thread(target=self.run, name="emulator-thread", daemon=True)
+        self.running = Event()
+
+    def samples(self, n: int) -> np.ndarray:
+        """Samples the signal as the ADC does, returns n 10-bit counts."""
+        if self.source is not None:
+            values = self.source.read(n)
+        else:
+            values = self.signal((self.sent + np.arange(n)) / self.rate)
+        counts = np.rint(values / ADC_SCALE)
+        return np.clip(counts, 0, 1023).astype(np.uint16)
+
+    def encode(self, counts: np.ndarray) -> bytes:
+        """Encodes the counts as the firmware sends them."""
+        if self.binary:
+            raw = encodeFrames(counts, self.sequence)
+            self.sequence = (self.sequence + len(counts) // FRAME_SAMPLES) % SEQUENCE_MODULO
+            return raw
+        text = "".join(f"{value:.2f}\r\n" for value in counts * ADC_SCALE)
+        return text.encode()
+
+    def write(self, raw: bytes):
+        """Writes raw bytes on the device side of the pty, useful to inject corrupted data."""
+        view = memoryview(raw)
+        while len(view) > 0 and self.running.is_set():
+            _, ready, _ = select.select([], [self.master], [], 0.1)
+            if ready:
+                n = os.write(self.master, view)
+                view = view[n:]
+
+    def run(self):
+        """Generates the samples due since the start, at a fixed write cadence."""
+        self.startTime = time.monotonic()
+        while self.running.is_set():
+            due = int((time.monotonic() - self.startTime) * self.rate) - self.sent
+            if self.binary:
+                due -= due % FRAME_SAMPLES
+            if due > 0:
+                counts = self.samples(due)
+                if self.binary:
+                    counts = counts[:len(counts) - len(counts) % FRAME_SAMPLES]
+                self.sent += due
+                self.write(self.encode(counts))
+            time.sleep(self.blockTime)
+
+    def start(self):
+        """Starts the emulated sampler."""
+        self.running.set()
+        self.thread.start()
+
+    def stop(self):
+        """Stops the emulated sampler and closes the pty pair."""
+        if self.running.is_set():
+            self.running.clear()
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
@@ -0,0 +1,107 @@
+from collections import deque
+
+import numpy as np
+
+
+class SampleQueue:
+    """A single-producer/single-consumer queue of samples over a preallocated numpy array.
+
+    The producer (e.g. the serial thread) only moves `head` and the consumer (e.g. the
+    GUI timer) only moves `tail`, both are monotonic counters published after the data
+    is written/read, so neither side takes a lock or waits on the other. A block that
+    does not fit on the free space is dropped and counted, the producer never blocks.
+    The producer can also stamp every block with its arrival time, the consumer takes
+    the stamps of the blocks it has read with `arrivals`.
+
+    Args:
+        capacity: max number of pending samples (rows).
+        dtype: type of the samples.
+        channels: number of channels, if it is given every sample is a row of the
+            (capacity x channels) array and the blocks are (rows x channels) arrays.
+    """
+    def __init__(self, capacity: int = 65536, dtype=np.float64, channels: int = None):
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        shape = (capacity,) if channels is None else (capacity, channels)
+        self.array = np.empty(shape, dtype=self.dtype)
+        self.empty = np.empty((0,) + shape[1:], dtype=self.dtype)
+        self.head = 0
+        self.tail = 0
+        self.overflows = 0
+        self.dropped = 0
+        self.stamps = deque(maxlen=4096)
+        self.stamped = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def free(self) -> int:
+        """Returns the number of samples that can be written without overflow."""
+        return self.capacity - (self.head - self.tail)
+
+    def put(self, values, now: float = None) -> bool:
+        """Writes a block of samples (producer side).
+
+        Args:
+            values: list/array with the new samples, (rows x channels) with channels.
+            now: arrival time of the block (secs), it's kept for `arrivals`.
+        Returns:
+            False if the block was dropped because the queue is full.
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        n = len(values)
+        if n > self.free():
+            self.overflows += 1
+            self.dropped += n
+            return False
+        start = self.head % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self.array[start:end] = values
+        else:
+            first = self.capacity - start
+            self.array[start:] = values[:first]
+            self.array[:n - first] = values[first:]
+        self.head += n
+        if now is not None:
+            self.stamps.append((self.head, now))
+        return True
+
+    def get(self) -> np.ndarray:
+        """Reads every pending sample (consumer side), returns a copy of them."""
+        head = self.head
+        n = head - self.tail
+        if n == 0:
+            return self.empty
+        start = self.tail % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            values = self.array[start:end].copy()
+        else:
+            values = np.concatenate((self.array[start:], self.array[:end - self.capacity]))
+        self.tail = head
+        return values
+
+    def arrivals(self) -> list:
+        """Returns the (samples, arrival time) of every stamped block read since the last call (consumer side)."""
+        blocks = []
+        while len(self.stamps) > 0 and self.stamps[0][0] <= self.tail:
+            end, now = self.stamps.popleft()
+            blocks.append((end - self.stamped, now))
+            self.stamped = end
+        return blocks
+
+    def clear(self):
+        """Discards the pending samples (consumer side)."""
+        self.tail = self.head
+
+    def stats(self) -> dict:
+        """Returns the queue counters."""
+        return {
+            "pending": len(self),
+            "written": self.head,
+            "read": self.tail,
+            "overflows": self.overflows,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,274 @@
+import numpy as np
+
+from .buffer import RingBuffer
+from .trigger import Trigger
+
+
+class WindowedExtreme:
+    """Sliding window max (or min) with a monotonic queue updated per block.
+
+    Only the samples greater than every later one can be the max of a future
+    window, each block is reduced to those candidates at once with numpy and the
+    queued ones it dominates are dropped, so the extreme is read in O(1).
+
+    Args:
+        window: window length (samples).
+        mode: 'max' or 'min'.
+    """
+    def __init__(self, window: int = 1000, mode: str = "max"):
+        self.window = window
+        self.sign = 1 if mode == "max" else -1
+        self.clear()
+
+    def clear(self):
+        """Discards every sample."""
+        self.indices = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0)
+        self.count = 0
+
+    def feed(self, block: np.ndarray):
+        """Updates the queue with a new block of samples."""
+        y = self.sign * block
+        n = len(y)
+        if n == 0:
+            return
+        suffix = np.maximum.accumulate(y[::-1])[::-1]
+        candidates = np.empty(n, dtype=bool)
+        candidates[-1] = True
+        candidates[:-1] = y[:-1] > suffix[1:]
+        positions = np.flatnonzero(candidates)
+
+        # The queue is decreasing: the values not greater than the block max are dominated
+        cut = np.searchsorted(-self.values, -suffix[0], side="left")
+        self.count += n
+        oldest = self.count - self.window
+        start = np.searchsorted(self.indices[:cut], oldest, side="left")
+        indices = positions + (self.count - n)
+        valid = indices >= oldest
+        self.indices = np.concatenate((self.indices[start:cut], indices[valid]))
+        self.values = np.concatenate((self.values[start:cut], y[positions[valid]]))
+
+    def value(self) -> float:
+        """Returns the extreme of the window (nan if it's empty)."""
+        if len(self.values) == 0:
+            return np.nan
+        return self.sign * self.values[0]
+
+
+class WindowedSum:
+    """Sliding window sum, the cumulative sums of the last window+1 samples are kept
+    on a ring so the sum of the window is the difference of its ends.
+
+    Args:
+        window: window length (samples).
+    """
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.sums = RingBuffer(window + 1)
+        self.clear()
+
+    def clear(self):
+        """Discards every sample."""
+        self.total = 0.0
+        self.sums.clear()
+        self.sums.append(0.0)
+
+    def feed(self, block: np.ndarray):
+        """Accumulates a new block of samples."""
+        if len(block) == 0:
+            return
+        sums = self.total + np.cumsum(block)
+        self.total = sums[-1]
+        self.sums.extend(sums)
+
+    def count(self) -> int:
+        """Returns the number of samples of the window."""
+        return len(self.sums) - 1
+
+    def value(self) -> float:
+        """Returns the sum of the window."""
+        return self.sums.last(1)[0] - self.sums.first()
+
+
+class Measurements:
+    """Standard scope measurements over the last `window` samples, updated per block.
+
+    Min/max come from monotonic queues and mean/RMS/duty from running sums, so
+    every value is read in O(1) whatever the window length. The level crossings
+    (frequency) and the 10%-90% rising edges (rise time) are detected with the
+    vectorized hysteresis of the Trigger.
+
+    Args:
+        window: window length (samples).
+        sampleRate: sample frequency (Hz), times are given in samples if it's None.
+        level: crossing level for frequency and duty, by default the middle of min and max.
+        hysteresis: the signal must go below level - hysteresis before a new crossing.
+        history: number of crossings/rise times kept.
+    """
+    def __init__(
+        self,
+        window: int = 1000,
+        sampleRate: float = None,
+        level: float = None,
+        hysteresis: float = 0.05,
+        history: int = 64,
+    ):
+        self.sampleRate = sampleRate
+        self.level = level
+        self.hysteresis = hysteresis
+        self.history = history
+        self.setWindow(window)
+
+    def setWindow(self, window: int):
+        """Updates the window length, discarding the current measurements."""
+        self.window = window
+        self.maximum = WindowedExtreme(window, "max")
+        self.minimum = WindowedExtreme(window, "min")
+        self.sum = WindowedSum(window)
+        self.squares = WindowedSum(window)
+        self.above = WindowedSum(window)
+        self.clear()
+
+    def setSampleRate(self, sampleRate: float):
+        """Updates the sample frequency used by the times."""
+        self.sampleRate = sampleRate
+
+    def clear(self):
+        """Discards every sample."""
+        for aggregate in (self.maximum, self.minimum, self.sum, self.squares, self.above):
+            aggregate.clear()
+        self.crossing = Trigger(hysteresis=self.hysteresis)
+        self.low = Trigger(hysteresis=self.hysteresis)
+        self.high = Trigger(hysteresis=self.hysteresis)
+        self.crossings = RingBuffer(self.history)
+        self.rises = RingBuffer(self.history)
+        self.lastLow = None
+        self.previous = None
+        self.count = 0
+
+    def getLevel(self) -> float:
+        """Returns the crossing level."""
+        if self.level is not None:
+            return self.level
+        return (self.maximum.value() + self.minimum.value()) / 2
+
+    def feed(self, block):
+        """Updates the measurements with a new block of samples.
+
+        Args:
+            block: list/array with the new samples.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if len(block) == 0:
+            return
+        self.maximum.feed(block)
+        self.minimum.feed(block)
+        self.sum.feed(block)
+        self.squares.feed(block * block)
+
+        level = self.getLevel()
+        self.above.feed(block >= level)
+        low, high = self.minimum.value(), self.maximum.value()
+        self.crossing.level = level
+        self.low.level = low + 0.1 * (high - low)
+        self.high.level = low + 0.9 * (high - low)
+
+        extended = np.concatenate(([block[0] if self.previous is None else self.previous], block))
+        crossings = self.crossingsOf(self.crossing, block, extended)
+        if len(crossings) > 0:
+            self.crossings.extend(crossings)
+
+        # Rise time: every 90% crossing with the last 10% crossing before it
+        lows = self.crossingsOf(self.low, block, extended)
+        highs = self.crossingsOf(self.high, block, extended)
+        if self.lastLow is not None:
+            lows = np.concatenate(([self.lastLow], lows))
+        if len(highs) > 0 and len(lows) > 0:
+            i = np.searchsorted(lows, highs, side="right") - 1
+            valid = i >= 0
+            valid[1:] &= i[1:] != i[:-1]
+            self.rises.extend(highs[valid] - lows[i[valid]])
+            self.lastLow = None if lows[-1] < highs[-1] else lows[-1]
+        elif len(lows) > 0:
+            self.lastLow = lows[-1]
+
+        self.previous = block[-1]
+        self.count += len(block)
+
+    def crossingsOf(self, detector: Trigger, block: np.ndarray, extended: np.ndarray) -> np.ndarray:
+        """Returns the positions (sample indexes) of the rising crossings of a block,
+        interpolated between the samples around them.
+
+        Args:
+            detector: edge detector with the crossing level.
+            block: new samples.
+            extended: the previous sample followed by the block.
+        """
+        edges = detector.edges(block)
+        before, after = extended[edges], extended[edges + 1]
+        step = np.where(after != before, after - before, 1)
+        fraction = np.clip((detector.level - before) / step, 0, 1)
+        return self.count + edges - 1 + fraction
+
+    def toTime(self, samples: float) -> float:
+        """Converts a number of samples to secs (when the sample rate is known)."""
+        return samples / self.sampleRate if self.sampleRate else samples
+
+    def vmin(self) -> float:
+        """Returns the min of the window."""
+        return self.minimum.value()
+
+    def vmax(self) -> float:
+        """Returns the max of the window."""
+        return self.maximum.value()
+
+    def vpp(self) -> float:
+        """Returns the peak to peak amplitude of the window."""
+        return self.vmax() - self.vmin()
+
+    def mean(self) -> float:
+        """Returns the mean of the window."""
+        n = self.sum.count()
+        return self.sum.value() / n if n > 0 else np.nan
+
+    def rms(self) -> float:
+        """Returns the RMS of the window."""
+        n = self.squares.count()
+        return np.sqrt(max(self.squares.value(), 0) / n) if n > 0 else np.nan
+
+    def period(self) -> float:
+        """Returns the mean period between the level crossings of the window."""
+        crossings = self.crossings.toArray()
+        crossings = crossings[crossings >= self.count - self.window]
+        if len(crossings) < 2:
+            return np.nan
+        return self.toTime((crossings[-1] - crossings[0]) / (len(crossings) - 1))
+
+    def frequency(self) -> float:
+        """Returns the frequency from the level crossings."""
+        return 1 / self.period()
+
+    def duty(self) -> float:
+        """Returns the fraction of the window above the level (0-1)."""
+        n = self.above.count()
+        return self.above.value() / n if n > 0 else np.nan
+
+    def riseTime(self) -> float:
+        """Returns the mean 10%-90% rise time of the last rising edges."""
+        if len(self.rises) == 0:
+            return np.nan
+        return self.toTime(self.rises.toArray().mean())
+
+    def values(self) -> dict:
+        """Returns every measurement."""
+        return {
+            "min": self.vmin(),
+            "max": self.vmax(),
+            "vpp": self.vpp(),
+            "mean": self.mean(),
+            "rms": self.rms(),
+            "period": self.period(),
+            "frequency": self.frequency(),
+            "duty": self.duty(),
+            "rise": self.riseTime(),
+        }
@@ -0,0 +1,203 @@
+import json
+import re
+
+import numpy as np
+
+
+class LineParser:
+    """Splits raw serial bytes in complete lines and parses them as a block of floats.
+
+    The bytes are written directly on a reusable buffer, a partial trailing line is
+    kept at the beginning of it and completed by the next read.
+
+    Args:
+        size: initial size of the read buffer (bytes).
+        dtype: type of the parsed values.
+    """
+    def __init__(self, size: int = 4096, dtype=np.float64):
+        self.buffer = bytearray(size)
+        self.length = 0
+        self.dtype = dtype
+        self.errors = 0
+        self.empty = np.empty(0, dtype=dtype)
+
+    def __len__(self):
+        return self.length
+
+    def clear(self):
+        """Discards the pending bytes."""
+        self.length = 0
+
+    def grow(self):
+        """Doubles the size of the read buffer."""
+        self.buffer.extend(bytes(len(self.buffer)))
+
+    def reserve(self, size: int) -> memoryview:
+        """Returns a writable view of the buffer, right after the pending bytes.
+
+        Args:
+            size: number of bytes to be written.
+        """
+        if self.length == len(self.buffer):
+            self.grow()
+        end = min(self.length + max(size, 1), len(self.buffer))
+        return memoryview(self.buffer)[self.length:end]
+
+    def commit(self, size: int) -> np.ndarray:
+        """Parses the complete lines after `size` new bytes were written on the reserved view.
+
+        Args:
+            size: number of bytes written.
+        """
+        end = self.length + size
+        last = self.buffer.rfind(b"\n", 0, end)
+        if last < 0:
+            self.length = end
+            return self.empty
+        with memoryview(self.buffer) as view:
+            raw = bytes(view[:last])
+        rest = end - last - 1
+        self.buffer[:rest] = self.buffer[last + 1:end]
+        self.length = rest
+        return self.parseChunk(raw)
+
+    def parseChunk(self, raw: bytes) -> np.ndarray:
+        """Parses a chunk of complete lines (without the last newline)."""
+        return self.parse(raw.split())
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """Appends bytes to the buffer and parses the complete lines.
+
+        Args:
+            data: raw bytes.
+        """
+        values = []
+        data = memoryview(data)
+        while len(data) > 0:
+            with self.reserve(len(data)) as view:
+                n = len(view)
+                view[:] = data[:n]
+            values.append(self.commit(n))
+            data = data[n:]
+        if len(values) == 1:
+            return values[0]
+        return np.concatenate(values) if values else self.empty
+
+    def parse(self, lines: list) -> np.ndarray:
+        """Converts a list of ASCII numbers to an array, malformed lines are counted and dropped.
+
+        Args:
+            lines: list of bytes.
+        """
+        if len(lines) == 0:
+            return self.empty
+        try:
+            return np.fromiter(map(float, lines), self.dtype, len(lines))
+        except ValueError:
+            values = []
+            for line in lines:
+                try:
+                    values.append(float(line))
+                except ValueError:
+                    self.errors += 1
+            return np.array(values, dtype=self.dtype)
+
+
+class SchemaParser(LineParser):
+    """Parses multi-channel lines, CSV (`1.0,2.0`) or fixed-shape JSON (`{"x": 1.0, "y": 2.0}`),
+    to a (rows x channels) block.
+
+    The schema is set up once, then a whole chunk is validated and converted with
+    a few C-level passes (numpy byte counts, bytes.split/re.findall and one
+    np.fromiter conversion). Only a
+    chunk with some malformed row is parsed line by line, the dropped rows are
+    counted on `errors`.
+
+    Args:
+        channels: names of the channels, in the order of the columns (the JSON keys).
+        format: 'csv' or 'json'.
+        delimiter: CSV delimiter.
+        size: initial size of the read buffer (bytes).
+        dtype: type of the parsed values.
+    """
+    def __init__(self, channels: list = ["x"], format: str = "csv", delimiter: str = ",", size: int = 4096, dtype=np.float64):
+        super().__init__(size, dtype)
+        self.channels = list(channels)
+        self.format = format
+        self.delimiter = delimiter.encode()
+        self.empty = np.empty((0, len(self.channels)), dtype=dtype)
+        names = [name.encode() for name in self.channels]
+        self.keys = np.array(names)
+        self.pattern = re.compile(rb'"(' + b"|".join(map(re.escape, names)) + rb')"\s*:\s*([^,}\s]+)')
+
+    def parseChunk(self, raw: bytes) -> np.ndarray:
+        """Parses a chunk of complete lines (without the last newline)."""
+        raw = raw.replace(b"\r", b"")
+        if self.format == "json":
+            block = self.parseJson(raw)
+        else:
+            block = self.parseCsv(raw)
+        if block is None:
+            return self.parseLines(raw.split(b"\n"))
+        return block
+
+    def parseCsv(self, raw: bytes):
+        """Fast path: every line must have one field per channel, otherwise it returns None."""
+        if len(raw) == 0:
+            return self.empty
+        stream = np.frombuffer(raw, dtype=np.uint8)
+        ends = np.append(np.flatnonzero(stream == 10), len(stream))
+        delimiters = np.flatnonzero(stream == self.delimiter[0])
+        counts = np.diff(np.searchsorted(delimiters, ends), prepend=0)
+        if np.any(counts != len(self.channels) - 1):
+            return None
+        fields = raw.replace(b"\n", self.delimiter).split(self.delimiter)
+        try:
+            return np.fromiter(map(float, fields), self.dtype, len(fields)).reshape(-1, len(self.channels))
+        except ValueError:
+            return None
+
+    def parseJson(self, raw: bytes):
+        """Fast path: every line must have the channel keys in order, otherwise it returns None."""
+        matches = self.pattern.findall(raw)
+        rows = raw.count(b"\n") + 1
+        if len(matches) != rows * len(self.channels):
+            return None
+        keys, values = zip(*matches) if len(matches) > 0 else ((), ())
+        if not np.array_equal(np.array(keys).reshape(rows, -1), np.broadcast_to(self.keys, (rows, len(self.channels)))):
+            return None
+        try:
+            return np.fromiter(map(float, values), self.dtype, len(values)).reshape(rows, len(self.channels))
+        except ValueError:
+            return None
+
+    def parseRow(self, line: bytes) -> list:
+        """Parses one line, it raises an error if it's malformed."""
+        if self.format == "json":
+            row = json.loads(line)
+            return [float(row[name]) for name in self.channels]
+        fields = line.split(self.delimiter)
+        if len(fields) != len(self.channels):
+            raise ValueError(f"expected {len(self.channels)} fields")
+        return [float(field) for field in fields]
+
+    def parseLines(self, lines: list) -> np.ndarray:
+        """Slow path: parses line by line, the malformed rows are counted and dropped."""
+        rows = []
+        for line in lines:
+            if len(line.strip()) == 0:
+                continue
+            try:
+                rows.append(self.parseRow(line))
+            except (ValueError, KeyError, TypeError):
+                self.errors += 1
+        if len(rows) == 0:
+            return self.empty
+        return np.array(rows, dtype=self.dtype)
+
+
+def createParser(mode: str = "chunked", channels: list = None, delimiter: str = ",", size: int = 4096):
+    """Returns the line parser of a read mode, a SchemaParser on 'csv'/'json' modes."""
+    if mode in ("csv", "json"):
+        return SchemaParser(channels or ["x"], mode, delimiter, size)
+    return LineParser(size)
@@ -0,0 +1,151 @@
+"""
+Binary sampling protocol used by `arduino/sampler/sampler.ino` on BINARY_MODE.
+
+Every frame carries FRAME_SAMPLES 10-bit ADC counts:
+
+    | 0xA5 | 0x5A | seq (uint16, LE) | payload (packed counts) | fletcher-16 (2 bytes) |
+
+Counts are packed by groups of 4 on 5 bytes: the low 8 bits of each count and a
+fifth byte with the two high bits of the four of them. The checksum covers the
+sequence number and the payload.
+"""
+import numpy as np
+
+
+SYNC = b"\xa5\x5a"
+FRAME_SAMPLES = 8
+PAYLOAD_SIZE = FRAME_SAMPLES // 4 * 5
+FRAME_SIZE = len(SYNC) + 2 + PAYLOAD_SIZE + 2
+SEQUENCE_MODULO = 1 << 16
+SAMPLE_SEQUENCE_MODULO = SEQUENCE_MODULO * FRAME_SAMPLES
+ADC_SCALE = 5 / 1024
+
+_SHIFTS = np.array([0, 2, 4, 6], dtype=np.uint8)
+
+
+def fletcher16(data: np.ndarray) -> np.ndarray:
+    """Computes the fletcher-16 checksum of every row of a 2-D uint8 array."""
+    partial = np.cumsum(data, axis=1, dtype=np.uint32)
+    sum1 = partial[:, -1] % 255
+    sum2 = partial.sum(axis=1, dtype=np.uint64) % 255
+    return np.stack([sum1, sum2], axis=1).astype(np.uint8)
+
+
+def packCounts(counts: np.ndarray) -> np.ndarray:
+    """Packs a (frames x FRAME_SAMPLES) array of 10-bit counts on (frames x PAYLOAD_SIZE) bytes."""
+    groups = np.asarray(counts, dtype=np.uint16).reshape(-1, 4)
+    high = ((groups >> 8) & 0x3).astype(np.uint8) << _SHIFTS
+    packed = np.empty((len(groups), 5), dtype=np.uint8)
+    packed[:, :4] = groups & 0xFF
+    packed[:, 4] = np.bitwise_or.reduce(high, axis=1)
+    return packed.reshape(-1, PAYLOAD_SIZE)
+
+
+def unpackCounts(payload: np.ndarray) -> np.ndarray:
+    """Unpacks a (frames x PAYLOAD_SIZE) array of bytes on (frames x FRAME_SAMPLES) counts."""
+    groups = payload.reshape(-1, 5)
+    high = (groups[:, 4:5] >> _SHIFTS) & 0x3
+    counts = groups[:, :4].astype(np.uint16) | (high.astype(np.uint16) << 8)
+    return counts.reshape(-1, FRAME_SAMPLES)
+
+
+def sampleSequence(sequence: np.ndarray) -> np.ndarray:
+    """Expands the frame sequence numbers to a sequence number per sample (modulo SAMPLE_SEQUENCE_MODULO)."""
+    return (sequence[:, None] * FRAME_SAMPLES + np.arange(FRAME_SAMPLES)).ravel()
+
+
+def encodeFrames(counts: np.ndarray, sequence: int = 0) -> bytes:
+    """Builds the frames for a block of counts, as the firmware does.
+
+    Args:
+        counts: 10-bit counts, its length must be a multiple of FRAME_SAMPLES.
+        sequence: sequence number of the first frame.
+    """
+    payload = packCounts(counts)
+    frames = len(payload)
+    seq = (sequence + np.arange(frames)) % SEQUENCE_MODULO
+    body = np.empty((frames, 2 + PAYLOAD_SIZE), dtype=np.uint8)
+    body[:, 0] = seq & 0xFF
+    body[:, 1] = seq >> 8
+    body[:, 2:] = payload
+    out = np.empty((frames, FRAME_SIZE), dtype=np.uint8)
+    out[:, :2] = np.frombuffer(SYNC, dtype=np.uint8)
+    out[:, 2:-2] = body
+    out[:, -2:] = fletcher16(body)
+    return out.tobytes()
+
+
+class FrameDecoder:
+    """Decodes a stream of binary frames, resynchronizing after corrupted or lost bytes.
+
+    Args:
+        scale: factor applied to the counts (volts per count), 1 keeps the raw counts.
+    """
+    def __init__(self, scale: float = ADC_SCALE):
+        self.scale = scale
+        self.pending = b""
+        self.frames = 0
+        self.errors = 0
+        self.skipped = 0
+        self.lastSequence = None
+
+    def clear(self):
+        """Discards the pending bytes."""
+        self.pending = b""
+
+    def feed(self, data: bytes):
+        """Decodes every complete frame found on the pending bytes plus the new ones.
+
+        Args:
+            data: raw bytes.
+        Returns:
+            a tuple with the sequence number of each frame and the (frames x FRAME_SAMPLES) samples.
+        """
+        raw = self.pending + bytes(data)
+        stream = np.frombuffer(raw, dtype=np.uint8)
+        end = len(stream) - FRAME_SIZE + 1
+        if end <= 0:
+            self.pending = raw
+            return self.decode(np.empty((0, FRAME_SIZE), dtype=np.uint8))
+
+        starts = np.flatnonzero((stream[:end] == SYNC[0]) & (stream[1:end + 1] == SYNC[1]))
+        frames = stream[starts[:, None] + np.arange(FRAME_SIZE)]
+        valid = np.all(fletcher16(frames[:, 2:-2]) == frames[:, -2:], axis=1)
+        invalid = starts[~valid]
+        starts = starts[valid]
+
+        # Keeps only the frames that don't overlap with the previous accepted one
+        accepted = []
+        position = 0
+        for start in starts:
+            if start >= position:
+                accepted.append(start)
+                self.skipped += int(start - position)
+                position = start + FRAME_SIZE
+
+        if end > position:
+            self.skipped += int(end - position)
+        self.pending = raw[max(position, end):]
+        accepted = np.asarray(accepted, dtype=np.intp)
+
+        # A sync header inside the payload of a valid frame is not a corrupted frame
+        inside = np.zeros(len(invalid), dtype=bool)
+        if len(accepted) > 0:
+            previous = np.searchsorted(accepted, invalid, side="right") - 1
+            inside = (previous >= 0) & (invalid < accepted[np.maximum(previous, 0)] + FRAME_SIZE)
+        self.errors += int(np.count_nonzero(~inside))
+
+        frames = stream[accepted[:, None] + np.arange(FRAME_SIZE)]
+        return self.decode(frames)
+
+    def decode(self, frames: np.ndarray):
+        """Converts an array of valid frames on sequence numbers and samples."""
+        body = frames[:, 2:-2]
+        sequence = body[:, 0].astype(np.int64) | (body[:, 1].astype(np.int64) << 8)
+        counts = unpackCounts(body[:, 2:])
+        self.frames += len(frames)
+        if len(sequence) > 0:
+            self.lastSequence = int(sequence[-1])
+        if self.scale == 1:
+            return sequence, counts
+        return sequence, counts * self.scale
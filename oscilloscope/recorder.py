@@ -0,0 +1,164 @@
+"""
+Append-only chunked binary capture format:
+
+    | magic (8) | header length (uint32) | JSON header | padding to 16 bytes |
+    | b"CHNK" | rows (uint32) | crc32 (uint32) | reserved (4) | rows x channels samples | padding | ...
+
+The JSON header has the channel names, the sample dtype, the sample rate and the
+start time. Every chunk carries the crc32 of its samples, so a capture cut by a
+crash is read up to its last complete chunk.
+"""
+import json
+import os
+import queue
+import struct
+import time
+import zlib
+from threading import Thread
+
+import numpy as np
+
+
+MAGIC = b"OSCREC\x00\x01"
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sIII")
+ALIGNMENT = 16
+
+
+def padding(size: int) -> int:
+    """Returns the bytes needed to align a size to ALIGNMENT."""
+    return -size % ALIGNMENT
+
+
+def encodeHeader(channels: list, dtype, sampleRate: float = None, startTime: float = None) -> bytes:
+    """Builds the file header."""
+    header = json.dumps({
+        "version": 1,
+        "channels": list(channels),
+        "dtype": np.dtype(dtype).newbyteorder("<").str,
+        "sampleRate": sampleRate,
+        "startTime": startTime,
+    }).encode()
+    raw = MAGIC + struct.pack("<I", len(header)) + header
+    return raw + bytes(padding(len(raw)))
+
+
+def encodeChunk(rows: np.ndarray) -> bytes:
+    """Builds a chunk with a (rows x channels) block of samples."""
+    payload = rows.tobytes()
+    header = CHUNK_HEADER.pack(CHUNK_MAGIC, len(rows), zlib.crc32(payload), 0)
+    return header + payload + bytes(padding(len(payload)))
+
+
+class Recorder:
+    """Streams samples to disk from a background writer thread.
+
+    The caller only puts blocks on a bounded queue (it never blocks, a block that
+    does not fit is dropped and counted), the writer thread groups them on chunks
+    and flushes the file periodically, so the memory used is fixed.
+
+    Args:
+        filepath: capture file.
+        channels: names of the channels.
+        dtype: type of the samples on disk.
+        sampleRate: sample frequency (Hz), stored on the header.
+        flushInterval: max time between flushes to disk (secs).
+        chunkRows: rows per chunk.
+        queueSize: max number of pending blocks.
+    """
+    def __init__(
+        self,
+        filepath: str,
+        channels: list = ["x"],
+        dtype=np.float32,
+        sampleRate: float = None,
+        flushInterval: float = 1.0,
+        chunkRows: int = 8192,
+        queueSize: int = 256,
+    ):
+        self.filepath = filepath
+        self.channels = list(channels)
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.sampleRate = sampleRate
+        self.flushInterval = flushInterval
+        self.chunkRows = chunkRows
+        self.queue = queue.Queue(maxsize=queueSize)
+        self.thread = Thread(target=self.run, name="recorder-thread", daemon=True)
+        self.file = None
+        self.startTime = None
+        self.rows = 0
+        self.chunks = 0
+        self.dropped = 0
+
+    def isRecording(self):
+        """Checks if the writer thread is running."""
+        return self.thread.is_alive()
+
+    def start(self):
+        """Creates the file, writes the header and starts the writer thread."""
+        folder = os.path.dirname(self.filepath)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.startTime = time.time()
+        self.file = open(self.filepath, "wb")
+        self.file.write(encodeHeader(self.channels, self.dtype, self.sampleRate, self.startTime))
+        self.thread.start()
+
+    def write(self, block):
+        """Queues a block of samples, (rows,) or (rows x channels).
+
+        Args:
+            block: list/array with the new samples.
+        """
+        block = np.array(block, dtype=self.dtype).reshape(-1, len(self.channels))
+        try:
+            self.queue.put_nowait(block)
+        except queue.Full:
+            self.dropped += len(block)
+
+    def writeChunk(self, blocks: list):
+        """Writes the pending blocks as one chunk."""
+        rows = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+        self.file.write(encodeChunk(rows))
+        self.rows += len(rows)
+        self.chunks += 1
+
+    def flush(self):
+        """Flushes the file to disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def run(self):
+        """Here the writer loop is executed."""
+        blocks = []
+        pending = 0
+        lastFlush = time.monotonic()
+        running = True
+        while running:
+            try:
+                block = self.queue.get(timeout=self.flushInterval)
+                if block is None:
+                    running = False
+                else:
+                    blocks.append(block)
+                    pending += len(block)
+            except queue.Empty:
+                pass
+
+            due = time.monotonic() - lastFlush >= self.flushInterval
+            if pending > 0 and (pending >= self.chunkRows or due or not running):
+                self.writeChunk(blocks)
+                blocks = []
+                pending = 0
+            if due or not running:
+                self.flush()
+                lastFlush = time.monotonic()
+
+    def stop(self):
+        """Writes the pending samples, stops the writer thread and closes the file."""
+        if self.isRecording():
+            self.queue.put(None)
+            self.thread.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -16,7 +16,8 @@ limitations under the License.
 
 # System modules
 from typing import Union
-from threading import Thread, Event
+from threading import Thread, Event, Lock
+import selectors
 import time
 import json
 
@@ -26,6 +27,95 @@ from serial.tools import list_ports
 
 # Custom modules
 from .sevent import Emitter
+from .parsers import createParser
+from .protocol import FrameDecoder, sampleSequence
+
+
+class PortWatcher:
+    """Enumerates the serial port devices on its own thread, one instance is shared by
+    every Serial, so the read loops never do the (sysfs walk) enumeration.
+
+    The list is cached and every subscribed device emits its 'ports' event when
+    the list it last received changes. Without subscribers the thread just waits.
+    Args:
+        refreshTime: default time between enumerations (secs).
+    """
+
+    instance = None
+    instanceLock = Lock()
+
+    def __init__(self, refreshTime: Union[int, float] = 1):
+        self.refreshTime = refreshTime
+        self.devices = None
+        self.subscribers = {}
+        self.lock = Lock()
+        self.wakeEvent = Event()
+        self.thread = Thread(target=self.run, name="port-watcher-thread", daemon=True)
+
+    @classmethod
+    def shared(cls):
+        """Returns the shared watcher."""
+        with cls.instanceLock:
+            if cls.instance is None:
+                cls.instance = cls()
+            return cls.instance
+
+    @staticmethod
+    def enumerate():
+        """Returns a list with the availables serial port devices (it's slow, it walks sysfs)."""
+        return [port.device for port in list_ports.comports()]
+
+    def isWatching(self):
+        """Checks if some device is subscribed."""
+        return len(self.subscribers) > 0
+
+    def getPorts(self):
+        """Returns the cached list of port devices, it's enumerated when nobody is subscribed."""
+        if self.devices is None or not self.isWatching():
+            return self.enumerate()
+        return self.devices
+
+    def getRefreshTime(self):
+        """Returns the shortest refresh time of the subscribers."""
+        with self.lock:
+            times = [device.portsRefreshTime for device, _ in self.subscribers.values()]
+        return min(times, default=self.refreshTime)
+
+    def subscribe(self, device):
+        """Adds a device to be notified, the watcher thread is started with the first one."""
+        with self.lock:
+            self.subscribers[id(device)] = [device, []]
+            if not self.thread.is_alive():
+                self.thread.start()
+        self.wakeEvent.set()
+
+    def unsubscribe(self, device):
+        """Removes a device."""
+        with self.lock:
+            self.subscribers.pop(id(device), None)
+
+    def notify(self):
+        """Emits the current list to the subscribers that did not receive it yet."""
+        with self.lock:
+            subscribers = list(self.subscribers.values())
+        for subscriber in subscribers:
+            device, lastDevicesList = subscriber
+            if lastDevicesList != self.devices:
+                subscriber[1] = self.devices
+                device.emit("ports", self.devices)
+
+    def run(self):
+        """Here the watcher loop is executed."""
+        while True:
+            if not self.isWatching():
+                self.wakeEvent.wait()
+            self.wakeEvent.clear()
+            try:
+                self.devices = self.enumerate()
+                self.notify()
+            except Exception as e:
+                print(f"-> PortWatcher :: {e}")
+            self.wakeEvent.wait(self.getRefreshTime())
 
 
 class Serial(Emitter):
@@ -34,11 +124,21 @@ class Serial(Emitter):
         name: device name.
         reconnectDelay: wait time between reconnection attempts.
         maxAttempts: max read attempts.
-        portsRefreshTime: time for check serial devices changes (secs).
+        portsRefreshTime: time for check serial devices changes (secs), they are
+            enumerated by the shared PortWatcher, 0 disables the 'ports' event.
         emitterIsEnabled: disable on/emit events (callbacks execution).
         emitAsDict: emit events on dict format {'emitter_name': data} ?
+        mode: read mode, 'line' (one sample per read), 'chunked' (blocks of samples),
+            'binary' (blocks of samples decoded from the sampler binary frames) or
+            'csv'/'json' (blocks of rows x channels from multi-channel lines, see SchemaParser).
+        chunkSize: initial size of the read buffer used on chunked/csv/json mode (bytes).
+        channels: names of the channels on csv/json mode (the column order/JSON keys).
+        delimiter: delimiter of the columns on csv mode.
     Events:
-        data: it's emitted when new data is available.
+        data: it's emitted when a new line is available (line mode).
+        data-block: it's emitted with a numpy array of samples per read (chunked/binary mode),
+            on binary mode a second array has the sequence number of every sample,
+            on csv/json mode the array has a row per line and a column per channel.
         connection: it's emitted when the connection status is updated.
         ports: it's emitted when a new device is found or disconnected.
     """
@@ -51,6 +151,10 @@ class Serial(Emitter):
         portsRefreshTime: int = 1,
         emitterIsEnabled: bool = True,
         emitAsDict: bool = True,
+        mode: str = "line",
+        chunkSize: int = 4096,
+        channels: list = None,
+        delimiter: str = ",",
         *args,
         **kwargs,
     ):
@@ -61,10 +165,12 @@ class Serial(Emitter):
         self.maxAttempts = maxAttempts
         self.portsRefreshTime = portsRefreshTime
         self.emitAsDict = emitAsDict
+        self.mode = mode
+        self.parser = createParser(mode, channels, delimiter, chunkSize)
+        self.decoder = FrameDecoder()
+        self.pendingLine = b""
         self.lastConnectionState = False
         self.attempts = 0
-        self.time = 0
-        self.lastDevicesList = []
         self.serial = PySerial(*args, **kwargs)
 
         self.thread = Thread(target=self.run, name="serial-thread", daemon=True)
@@ -130,12 +236,22 @@ class Serial(Emitter):
     def start(self):
         """Starts read loop."""
         self.running.set()
+        self.watchPorts()
         self.thread.start()
 
     @staticmethod
     def ports():
         """Returns a list with the availables serial port devices."""
-        return [port.device for port in list_ports.comports()]
+        return PortWatcher.shared().getPorts()
+
+    def watchPorts(self):
+        """Subscribes to the shared port watcher ('ports' events)."""
+        if self.portsRefreshTime > 0:
+            PortWatcher.shared().subscribe(self)
+
+    def unwatchPorts(self):
+        """Unsubscribes from the shared port watcher."""
+        PortWatcher.shared().unsubscribe(self)
 
     def connect(self):
         """Will try to connect with the specified serial device."""
@@ -183,6 +299,10 @@ class Serial(Emitter):
 
     def readData(self):
         """Will try to read incoming data."""
+        if self.mode in ("chunked", "csv", "json"):
+            return self.readChunk()
+        if self.mode == "binary":
+            return self.readFrames()
         try:
             data = self.serial.readline().decode().rstrip()
             if len(data) > 0:
@@ -191,27 +311,73 @@ class Serial(Emitter):
                 self.emit("data", data)
                 return data
         except Exception as e:
-            print(f"-> Serial - {self.name} :: {e}")
-            if not self.attemptsLimitReached():
-                self.attempts += 1
-            else:
-                self.attempts = 0
-                try:
-                    self.serial.close()
-                except Exception as e:
-                    print(f"-> Serial - {self.name} :: {e}")
+            self.readFailed(e)
             return None
 
-    def checkSerialPorts(self, dt: Union[int, float]):
-        """Monitors if there are changes in the serial devices."""
-        if self.portsRefreshTime > 0:
-            self.time += dt
-            if self.time >= self.portsRefreshTime:
-                actualDevicesList = self.ports()
-                if actualDevicesList != self.lastDevicesList:
-                    self.lastDevicesList = actualDevicesList
-                    self.emit("ports", actualDevicesList)
-                self.time = 0
+    def readChunk(self):
+        """Will try to drain the incoming bytes and parse the complete lines as a block."""
+        try:
+            with self.parser.reserve(self.serial.in_waiting) as view:
+                size = self.serial.readinto(view)
+            data = self.parser.commit(size)
+            if len(data) > 0:
+                if self.emitAsDict:
+                    data = {self.name: data}
+                self.emit("data-block", data)
+                return data
+        except Exception as e:
+            self.parser.clear()
+            self.readFailed(e)
+            return None
+
+    def readFrames(self):
+        """Will try to drain the incoming bytes and decode the complete binary frames."""
+        try:
+            raw = self.serial.read(max(self.serial.in_waiting, 1))
+            sequence, samples = self.decoder.feed(raw)
+            if len(samples) > 0:
+                data = samples.ravel()
+                if self.emitAsDict:
+                    data = {self.name: data}
+                self.emit("data-block", data, sampleSequence(sequence))
+                return data
+        except Exception as e:
+            self.decoder.clear()
+            self.readFailed(e)
+            return None
+
+    def readLines(self):
+        """Will try to drain the incoming bytes and emit every complete line, without blocking."""
+        try:
+            self.pendingLine += self.serial.read(self.serial.in_waiting)
+            *lines, self.pendingLine = self.pendingLine.split(b"\n")
+            for line in lines:
+                data = line.decode().rstrip()
+                if len(data) > 0:
+                    if self.emitAsDict:
+                        data = {self.name: data}
+                    self.emit("data", data)
+        except Exception as e:
+            self.pendingLine = b""
+            self.readFailed(e)
+
+    def readAvailable(self):
+        """Reads the bytes already received without blocking (used by the multiplexed loop)."""
+        if self.mode == "line":
+            return self.readLines()
+        return self.readData()
+
+    def readFailed(self, e: Exception):
+        """Counts a failed read attempt and closes the port when the limit is reached."""
+        print(f"-> Serial - {self.name} :: {e}")
+        if not self.attemptsLimitReached():
+            self.attempts += 1
+        else:
+            self.attempts = 0
+            try:
+                self.serial.close()
+            except Exception as e:
+                print(f"-> Serial - {self.name} :: {e}")
 
     def checkConnectionStatus(self):
         """Checks if the connection status changes."""
@@ -231,8 +397,6 @@ class Serial(Emitter):
     def run(self):
         """Here the run loop is executed."""
         while self.running.is_set():
-            t0 = time.time()
-
             self.checkConnectionStatus()
 
             if self.serial.isOpen():
@@ -240,10 +404,6 @@ class Serial(Emitter):
             else:
                 self.reconnect()
 
-            t1 = time.time()
-            dt = t1 - t0
-
-            self.checkSerialPorts(dt)
             self.needAPause()
 
     def disconnect(self, force: bool = False):
@@ -261,9 +421,84 @@ class Serial(Emitter):
         """Stops the read loop an closed the connection with the serial device."""
         self.resume()
         self.disconnect()
+        self.unwatchPorts()
+        if self.running.is_set():
+            self.running.clear()
+            if self.thread.is_alive():
+                self.thread.join()
+
+
+class SerialMultiplexer:
+    """Services many serial devices from one thread, every open port is registered
+    on a selector (epoll on Linux) and only the ready ones are read, in bulk.
+
+    A device is serviced while its `running` flag is set, the closed ones are
+    reconnected every `reconnectDelay` secs and the paused ones are unregistered.
+    Args:
+        devices: dict with the Serial devices (not started), by name.
+        timeout: max wait for new data (secs), the connections are checked at this rate.
+    """
+
+    def __init__(self, devices: dict = {}, timeout: float = 0.1):
+        self.devices = devices
+        self.timeout = timeout
+        self.selector = selectors.DefaultSelector()
+        self.registered = {}
+        self.retryTime = {}
+        self.thread = Thread(target=self.run, name="serial-multiplexer-thread", daemon=True)
+        self.running = Event()
+
+    def isActive(self, device: Serial):
+        """Checks if a device must be read."""
+        return device.running.is_set() and device.pauseEvent.is_set() and device.isOpen()
+
+    def update(self):
+        """Unregisters the closed/paused/stopped ports, then reconnects and registers the rest."""
+        for name, device in self.devices.items():
+            fd = self.registered.get(name)
+            if fd is not None and (not self.isActive(device) or device.serial.fileno() != fd):
+                self.selector.unregister(fd)
+                del self.registered[name]
+            if not device.running.is_set() and device.isOpen():
+                device.disconnect()
+
+        now = time.monotonic()
+        for name, device in self.devices.items():
+            if device.running.is_set() and not device.isOpen() and device.hasDevice():
+                if now >= self.retryTime.get(name, 0):
+                    self.retryTime[name] = now + device.reconnectDelay
+                    device.connect()
+            device.checkConnectionStatus()
+            if name not in self.registered and self.isActive(device):
+                fd = device.serial.fileno()
+                self.selector.register(fd, selectors.EVENT_READ, device)
+                self.registered[name] = fd
+
+    def run(self):
+        """Here the multiplexed loop is executed."""
+        while self.running.is_set():
+            self.update()
+            if len(self.registered) > 0:
+                for key, _ in self.selector.select(self.timeout):
+                    key.data.readAvailable()
+            else:
+                time.sleep(self.timeout)
+
+    def start(self):
+        """Starts the multiplexed loop."""
+        self.running.set()
+        for device in self.devices.values():
+            device.watchPorts()
+        self.thread.start()
+
+    def stop(self):
+        """Stops the multiplexed loop and closes the selector."""
         if self.running.is_set():
             self.running.clear()
             self.thread.join()
+        for device in self.devices.values():
+            device.unwatchPorts()
+        self.selector.close()
 
 
 class Serials:
@@ -274,13 +509,18 @@ class Serials:
         maxAttempts: max read attempts.
         portsRefreshTime: time for check serial devices changes.
         emitterIsEnabled: disable on/emit events (callbacks execution).
+        backend: 'threads' (a read thread per device) or 'selector' (every device
+            is read from one thread, see SerialMultiplexer).
     Events:
         data: it's emitted when new data is available.
+        data-block: it's emitted with a numpy array of samples per read (chunked/binary mode).
         connection: it's emitted when the connection status is updated.
         ports: it's emitted when a new device is found or disconnected.
     """
 
-    def __init__(self, devices: dict = {}, *args, **kwargs):
+    def __init__(self, devices: dict = {}, backend: str = "threads", *args, **kwargs):
+        self.backend = backend
+        self.multiplexer = None
         self.devices = {}
         if len(devices) > 0:
             for name, settings in devices.items():
@@ -308,8 +548,23 @@ class Serials:
         devices = list(set(devices))
         self.devices = [Serial(port=name, *args, **kwargs) for name in devices]
 
+    def isMultiplexed(self):
+        """Checks if the devices are read from one multiplexed thread."""
+        return self.backend == "selector"
+
+    def startMultiplexer(self):
+        """Starts the multiplexed loop if it's not running yet."""
+        if self.multiplexer is None:
+            self.multiplexer = SerialMultiplexer(self.devices)
+            self.multiplexer.start()
+
     def startAll(self):
         """Starts all serial devices"""
+        if self.isMultiplexed():
+            for device in self.devices.values():
+                device.running.set()
+            self.startMultiplexer()
+            return
         for device in self.devices.values():
             device.start()
 
@@ -319,10 +574,17 @@ class Serials:
             name: device name.
         """
         if name in self.devices:
-            self.devices[name].start()
+            if self.isMultiplexed():
+                self.devices[name].running.set()
+                self.startMultiplexer()
+            else:
+                self.devices[name].start()
 
     def stopAll(self):
         """Stops all serial devices running."""
+        if self.multiplexer is not None:
+            self.multiplexer.stop()
+            self.multiplexer = None
         for device in self.devices.values():
             device.stop()
 
@@ -332,7 +594,11 @@ class Serials:
             name: device name.
         """
         if name in self.devices:
-            self.device[name].stop()
+            if self.multiplexer is not None:
+                # The multiplexed loop closes it from its own thread
+                self.devices[name].running.clear()
+            else:
+                self.devices[name].stop()
 
     def pauseOnly(self, deviceName: str = "default"):
         """Pauses a specific camera device.
@@ -365,7 +631,7 @@ class Serials:
     @staticmethod
     def ports():
         """Returns a list with the availables serial port devices."""
-        return [port.device for port in list_ports.comports()]
+        return PortWatcher.shared().getPorts()
 
     def toJson(self, data: str = ""):
         """Converts a string to a json.
@@ -1,12 +1,15 @@
 """
 Taken from: https://github.com/Hikki12/sevent
 """
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
 
 class Emitter:
     """This class implements a simple event emitter.
-    
+
     Example usage::
-        event = Emitter() 
+        event = Emitter()
         event.on('ready', callback)
         do_something()
         event.emit('ready', 'Finished!')
@@ -14,12 +17,61 @@ class Emitter:
     def __init__(self, *args, **kwargs):
         self.callback = None
         self.callbacks = {}
+        self.listeners = {}
+        self.executor = None
+
+    @staticmethod
+    def arity(callback):
+        """It returns how many positional arguments a callback takes, None if it takes any number.
+
+        It is decided once per listener, so functions, bound methods, builtins and
+        partials are supported and listeners can ignore trailing arguments.
+
+        :param callback: function
+        """
+        try:
+            parameters = inspect.signature(callback).parameters.values()
+        except (TypeError, ValueError):
+            return None
+        count = 0
+        for parameter in parameters:
+            if parameter.kind == parameter.VAR_POSITIONAL:
+                return None
+            if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+                count += 1
+        return count
 
-    def on(self, event_name, callback):
+    def setExecutor(self, executor):
+        """It sets the executor used by the non-blocking listeners.
+
+        :param executor: a concurrent.futures.Executor
+        """
+        self.executor = executor
+
+    def getExecutor(self):
+        """It returns the executor of the non-blocking listeners, by default a single worker (keeps the order)."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emitter")
+        return self.executor
+
+    @staticmethod
+    def report(future):
+        """It prints the exception raised by a non-blocking listener, it would be lost on its future otherwise.
+
+        :param future: future of the listener call
+        """
+        if future.cancelled():
+            return
+        e = future.exception()
+        if e is not None:
+            print(f"-> Emitter :: {e}")
+
+    def on(self, event_name, callback, blocking=True):
         """It sets the callback functions.
 
         :param event_name: str, name of the event
         :param callback: function
+        :param blocking: bool, if it is False the callback runs on the executor, so a slow listener doesn't stall the emitter.
         """
         if self.callbacks is None:
             self.callbacks = {}
@@ -28,14 +80,39 @@ class Emitter:
         else:
             self.callbacks[event_name].append(callback)
 
+        listener = (callback, self.arity(callback))
+        if not blocking:
+            submit = self.getExecutor().submit
+            def background(*args, **kwargs):
+                submit(callback, *args, **kwargs).add_done_callback(self.report)
+            listener = (background, listener[1])
+        self.listeners[event_name] = self.listeners.get(event_name, ()) + (listener,)
+
+    def off(self, event_name, callback=None):
+        """It removes a callback function, or every callback of the event.
+
+        :param event_name: str, name of the event
+        :param callback: function
+        """
+        callbacks = self.callbacks.get(event_name, [])
+        listeners = list(self.listeners.get(event_name, ()))
+        indexes = [i for i, f in enumerate(callbacks) if callback is None or f == callback]
+        for i in reversed(indexes):
+            del callbacks[i]
+            del listeners[i]
+        self.listeners[event_name] = tuple(listeners)
+
+    def hasListeners(self, event_name):
+        """It checks if the event has some callback function.
+
+        :param event_name: str, name of the event.
+        """
+        return len(self.listeners.get(event_name, ())) > 0
+
     def emit(self, event_name, *args, **kwargs):
         """It emits an event, and calls the corresponding callback function.
-        
+
         :param event_name: str, name of the event.
         """
-        if self.callbacks is not None and event_name in self.callbacks:
-            for callback in self.callbacks[event_name]:
-                if callback.__code__.co_argcount > 0:
-                    callback(*args, **kwargs)
-                else:
-                    callback()
\ No newline at end of file
+        for listener, arity in self.listeners.get(event_name, ()):
+            listener(*args[:arity], **kwargs)
@@ -0,0 +1,291 @@
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .buffer import RingBuffer
+
+
+FLATTOP = (0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368)
+
+
+@lru_cache(maxsize=32)
+def getWindow(name: str = "hann", N: int = 1024) -> np.ndarray:
+    """Returns a (cached, read-only) window of length N.
+
+    Args:
+        name: 'hann', 'blackman', 'flattop' or 'rect'.
+        N: window length.
+    """
+    if name == "hann":
+        window = np.hanning(N)
+    elif name == "blackman":
+        window = np.blackman(N)
+    elif name == "flattop":
+        k = 2 * np.pi * np.arange(N) / (N - 1)
+        window = sum((-1) ** i * a * np.cos(i * k) for i, a in enumerate(FLATTOP))
+    elif name == "rect":
+        window = np.ones(N)
+    else:
+        raise ValueError(f"Not valid window: {name}")
+    window.setflags(write=False)
+    return window
+
+
+def segmentSpectra(segments: np.ndarray, window: np.ndarray, detrend: bool = False) -> np.ndarray:
+    """Returns the power spectrum (|rfft|^2) of every row of a (segments x N) array."""
+    if detrend:
+        segments = segments - segments.mean(axis=1, keepdims=True)
+    spectra = np.fft.rfft(segments * window, axis=1)
+    return spectra.real ** 2 + spectra.imag ** 2
+
+
+def amplitudeScale(window: np.ndarray) -> np.ndarray:
+    """Returns the factor that converts sqrt(power) to the amplitude of a one-sided spectrum."""
+    N = len(window)
+    scale = np.full(N // 2 + 1, 2 / window.sum())
+    scale[0] /= 2
+    if N % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+def welch(x, Fs: float = 1, nperseg: int = 1024, overlap: float = 0.5, window: str = "hann", detrend: bool = False):
+    """Averaged magnitude spectrum over overlapping segments (Welch method).
+
+    Args:
+        x: signal samples.
+        Fs: sample frequency (Hz).
+        nperseg: samples per segment.
+        overlap: overlapped fraction between segments (0-1).
+        window: window name, see getWindow.
+        detrend: remove the mean of every segment?
+    Returns:
+        the frequency axis (Hz) and the magnitude of each frequency.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    nperseg = min(nperseg, len(x))
+    hop = max(1, int(nperseg * (1 - overlap)))
+    w = getWindow(window, nperseg)
+    segments = sliding_window_view(x, nperseg)[::hop]
+    power = segmentSpectra(segments, w, detrend).mean(axis=0)
+    return np.fft.rfftfreq(nperseg, 1 / Fs), np.sqrt(power) * amplitudeScale(w)
+
+
+class SegmentStream:
+    """Splits a stream of samples on overlapping segments and transforms each one once.
+
+    Args:
+        nperseg: samples per segment.
+        overlap: overlapped fraction between segments (0-1).
+        window: window name, see getWindow.
+        detrend: remove the mean of every segment?
+    """
+    def __init__(self, nperseg: int = 1024, overlap: float = 0.5, window: str = "hann", detrend: bool = True):
+        self.nperseg = nperseg
+        self.overlap = overlap
+        self.window = window
+        self.detrend = detrend
+        self.hop = max(1, int(nperseg * (1 - overlap)))
+        self.pending = np.empty(0)
+
+    def bins(self) -> int:
+        """Returns the number of frequency bins."""
+        return self.nperseg // 2 + 1
+
+    def transform(self, block, limit: int = None):
+        """Returns the power spectra (segments x bins) of the segments completed by a new block,
+        the samples of the last incomplete segment are kept for the next one (hop overlap).
+
+        Args:
+            block: list/array with the new samples.
+            limit: transform only the last `limit` completed segments.
+        """
+        data = np.concatenate((self.pending, np.asarray(block, dtype=np.float64)))
+        if len(data) < self.nperseg:
+            self.pending = data
+            return None
+        count = (len(data) - self.nperseg) // self.hop + 1
+        segments = sliding_window_view(data, self.nperseg)[::self.hop]
+        if limit is not None:
+            segments = segments[-limit:]
+        self.pending = data[count * self.hop:]
+        return segmentSpectra(segments, getWindow(self.window, self.nperseg), self.detrend)
+
+
+class SpectrumAnalyzer:
+    """A streaming spectrum analyzer (Welch averaging over the last segments).
+
+    Only the segments completed by the new samples are transformed, their power
+    spectra are kept on a ring buffer, and the average is recomputed when it is
+    requested after new data arrived.
+
+    Args:
+        sampleRate: sample frequency (Hz), it sets the frequency axis.
+        nperseg: samples per segment.
+        overlap: overlapped fraction between segments (0-1).
+        window: window name, see getWindow.
+        averages: number of segments averaged.
+        detrend: remove the mean of every segment?
+    """
+    def __init__(
+        self,
+        sampleRate: float = 1,
+        nperseg: int = 1024,
+        overlap: float = 0.5,
+        window: str = "hann",
+        averages: int = 8,
+        detrend: bool = True,
+    ):
+        self.sampleRate = sampleRate
+        self.nperseg = nperseg
+        self.overlap = overlap
+        self.window = window
+        self.averages = averages
+        self.detrend = detrend
+        self.configure()
+
+    def configure(self):
+        """Applies the segment settings, discarding the current spectra."""
+        self.stream = SegmentStream(self.nperseg, self.overlap, self.window, self.detrend)
+        self.spectra = RingBuffer(self.averages, channels=self.stream.bins())
+        self.scale = amplitudeScale(getWindow(self.window, self.nperseg))
+        self.clear()
+
+    def clear(self):
+        """Discards the pending samples and the spectra."""
+        self.stream.pending = np.empty(0)
+        self.spectra.clear()
+        self.magnitude = np.zeros(self.stream.bins())
+        self.changed = False
+
+    def setSampleRate(self, sampleRate: float):
+        """Updates the sample frequency used by the frequency axis."""
+        self.sampleRate = sampleRate
+
+    def feed(self, block):
+        """Transforms the segments completed by a new block of samples.
+
+        Args:
+            block: list/array with the new samples.
+        """
+        power = self.stream.transform(block, self.averages)
+        if power is not None:
+            self.spectra.extend(power.T)
+            self.changed = True
+
+    def frequencies(self) -> np.ndarray:
+        """Returns the frequency axis (Hz)."""
+        return np.fft.rfftfreq(self.nperseg, 1 / self.sampleRate)
+
+    def spectrum(self):
+        """Returns the frequency axis (Hz) and the averaged magnitude, recomputed only after new data."""
+        if self.changed and len(self.spectra) > 0:
+            power = self.spectra.toArray().mean(axis=1)
+            self.magnitude = np.sqrt(power) * self.scale
+            self.changed = False
+        return self.frequencies(), self.magnitude
+
+
+class Spectrogram:
+    """An incremental STFT (waterfall) over a fixed-size ring image.
+
+    Only the columns of the segments completed by the new samples are computed,
+    converted (to dB, and to colours when a lookup table is given) and written
+    on their ring slots. Every column is stored twice, on its slot and one
+    history later, so the last `history` columns in time order are always a
+    contiguous view of the ring: scrolling the image is an offset, not a copy,
+    and the cost per block depends on the incoming data rate and not on the
+    history shown.
+
+    Args:
+        sampleRate: sample frequency (Hz).
+        nperseg: samples per segment (column).
+        overlap: overlapped fraction between segments (0-1).
+        window: window name, see getWindow.
+        history: number of columns kept.
+        detrend: remove the mean of every segment?
+        levels: (min, max) dB mapped to the first/last colour of the lookup table.
+        lut: lookup table (colours x channels, uint8), the image is stored in dB if it's None.
+    """
+    def __init__(
+        self,
+        sampleRate: float = 1,
+        nperseg: int = 256,
+        overlap: float = 0.5,
+        window: str = "hann",
+        history: int = 500,
+        detrend: bool = True,
+        levels: tuple = (-80, 20),
+        lut: np.ndarray = None,
+    ):
+        self.sampleRate = sampleRate
+        self.nperseg = nperseg
+        self.overlap = overlap
+        self.window = window
+        self.history = history
+        self.detrend = detrend
+        self.levels = levels
+        self.lut = None if lut is None else np.asarray(lut, dtype=np.uint8)
+        self.configure()
+
+    def configure(self):
+        """Applies the segment settings, discarding the current image."""
+        self.stream = SegmentStream(self.nperseg, self.overlap, self.window, self.detrend)
+        if self.lut is None:
+            self.ring = np.empty((2 * self.history, self.stream.bins()), dtype=np.float32)
+        else:
+            self.ring = np.empty((2 * self.history, self.stream.bins(), self.lut.shape[1]), dtype=np.uint8)
+        self.scale = amplitudeScale(getWindow(self.window, self.nperseg))
+        self.clear()
+
+    def clear(self):
+        """Discards the pending samples and the image."""
+        self.stream.pending = np.empty(0)
+        self.index = 0
+        self.count = 0
+        self.changed = False
+
+    def setSampleRate(self, sampleRate: float):
+        """Updates the sample frequency used by the axes."""
+        self.sampleRate = sampleRate
+
+    def colorize(self, db: np.ndarray) -> np.ndarray:
+        """Maps dB columns to the lookup table colours (or returns them if there is no table)."""
+        if self.lut is None:
+            return db
+        low, high = self.levels
+        position = np.clip((db - low) / (high - low), 0, 1) * (len(self.lut) - 1)
+        return self.lut[position.astype(np.intp)]
+
+    def feed(self, block):
+        """Computes the columns of the segments completed by a new block of samples.
+
+        Args:
+            block: list/array with the new samples.
+        """
+        power = self.stream.transform(block, self.history)
+        if power is not None:
+            magnitude = np.sqrt(power) * self.scale
+            columns = self.colorize(20 * np.log10(np.maximum(magnitude, 1e-12)))
+            slots = (self.index + np.arange(len(columns))) % self.history
+            self.ring[slots] = columns
+            self.ring[slots + self.history] = columns
+            self.index = (self.index + len(columns)) % self.history
+            self.count += len(columns)
+            self.changed = True
+
+    def image(self) -> np.ndarray:
+        """Returns the image (columns x bins, oldest column first), a view of the ring."""
+        self.changed = False
+        n = min(self.count, self.history)
+        end = self.index + self.history
+        return self.ring[end - n:end]
+
+    def columnTime(self) -> float:
+        """Returns the time between two columns (secs)."""
+        return self.stream.hop / self.sampleRate
+
+    def maxFrequency(self) -> float:
+        """Returns the frequency of the last bin (Hz)."""
+        return self.sampleRate / 2
@@ -0,0 +1,288 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from .sevent import Emitter
+
+
+class RateEstimator:
+    """Sliding window estimation of a sample rate from the arrival of blocks.
+
+    Every block is timestamped once (monotonic clock) with the total count of
+    samples, the rate is the slope of a linear regression of the count against
+    the time over the last `window` secs, so the bursts of the USB-serial
+    deliveries are averaged out. The fit is only solved when a value is
+    requested after new blocks.
+
+    Args:
+        window: time window of the fit (secs).
+        points: max number of blocks kept.
+    """
+    def __init__(self, window: float = 2.0, points: int = 512):
+        self.window = window
+        self.points = deque(maxlen=points)
+        self.clear()
+
+    def clear(self):
+        """Discards every block."""
+        self.points.clear()
+        self.total = 0
+        self.changed = False
+        self.estimatedRate = 0.0
+        self.stderr = np.inf
+        self.residual = 0.0
+
+    def update(self, n: int, now: float = None):
+        """Timestamps a new block.
+
+        Args:
+            n: number of samples of the block.
+            now: arrival time (secs, monotonic), by default the current one.
+        """
+        self.total += n
+        self.points.append((time.monotonic() if now is None else now, self.total))
+        self.changed = True
+
+    def solve(self):
+        """Fits the count against the time over the window, if new blocks arrived."""
+        if not self.changed:
+            return
+        self.changed = False
+        if len(self.points) < 3:
+            return
+        t, count = np.array(self.points).T
+        recent = t >= t[-1] - self.window
+        t, count = t[recent], count[recent]
+        if len(t) < 3:
+            return
+        t = t - t.mean()
+        count = count - count.mean()
+        sxx = t @ t
+        if sxx <= 0:
+            return
+        self.estimatedRate = (t @ count) / sxx
+        residuals = count - self.estimatedRate * t
+        variance = (residuals @ residuals) / (len(t) - 2)
+        self.stderr = np.sqrt(variance / sxx)
+        self.residual = np.sqrt(variance)
+
+    def rate(self) -> float:
+        """Returns the estimated rate (Hz), 0 if it is not known yet."""
+        self.solve()
+        return max(self.estimatedRate, 0.0)
+
+    def jitter(self) -> float:
+        """Returns the std of the block arrivals around the fit (secs)."""
+        rate = self.rate()
+        return self.residual / rate if rate > 0 else 0.0
+
+    def confidence(self) -> float:
+        """Returns the confidence of the rate (0-1), one minus its relative standard error."""
+        rate = self.rate()
+        if rate <= 0 or not np.isfinite(self.stderr):
+            return 0.0
+        return float(np.clip(1 - self.stderr / rate, 0, 1))
+
+
+class SampleClock(Emitter):
+    """Builds the time axis of a stream from the sample index instead of the host clock.
+
+    Every sample gets an index (from the device sequence counter or an implicit
+    counter), its time is index / sampleRate. Gaps in the sequence are reported as
+    dropped samples. The host clock is only read once per block, to estimate the
+    sample rate when it is not known (see RateEstimator). Single samples are
+    counted and timestamped together, about once every `stampInterval`: the
+    stride between timestamps follows the rate seen since the previous one and
+    it is bounded by `maxStride`, so a burst can't stop the clock reads at a
+    later slow rate.
+
+    Args:
+        sampleRate: known sample rate (Hz), if it's None it is estimated from the arrival of the blocks.
+        modulo: wrap-around of the sequence counter, None if it doesn't wrap.
+        window: time window of the rate estimation (secs).
+        stampInterval: time between the timestamps of single samples (secs).
+        maxStride: max number of single samples between timestamps.
+    Events:
+        dropped: it's emitted with the number of missing samples when a gap is detected.
+    """
+    def __init__(self, sampleRate: float = None, modulo: int = None, window: float = 2.0, stampInterval: float = 0.01, maxStride: int = 64):
+        super().__init__()
+        self.sampleRate = sampleRate
+        self.modulo = modulo
+        self.stampInterval = stampInterval
+        self.maxStride = maxStride
+        self.estimator = RateEstimator(window)
+        self.dropped = 0
+        self.gaps = 0
+        self.clear()
+
+    def clear(self):
+        """Restarts the index count and the rate estimation."""
+        self.next = 0
+        self.total = 0
+        self.lastSequence = None
+        self.pending = 0
+        self.stride = 1
+        self.lastStamp = None
+        self.estimator.clear()
+
+    def restart(self):
+        """Restarts the index count (time 0 on the next sample), the gap detection goes on."""
+        self.next = 0
+
+    def rate(self) -> float:
+        """Returns the known or estimated sample rate (Hz), 0 if it is not known yet."""
+        if self.sampleRate:
+            return self.sampleRate
+        return self.estimator.rate()
+
+    def interval(self) -> float:
+        """Returns the sample interval (secs), 0 if the rate is not known yet."""
+        rate = self.rate()
+        return 1 / rate if rate > 0 else 0
+
+    def unwrap(self, sequence: np.ndarray) -> np.ndarray:
+        """Converts a block of sequence numbers to increments from the previous sample."""
+        previous = sequence[0] - 1 if self.lastSequence is None else self.lastSequence
+        steps = np.diff(sequence, prepend=previous)
+        if self.modulo is not None:
+            steps %= self.modulo
+        self.lastSequence = int(sequence[-1])
+        return steps
+
+    def indices(self, n: int, sequence=None, now: float = None) -> np.ndarray:
+        """Returns the indexes of a block of n samples.
+
+        Args:
+            n: number of samples of the block.
+            sequence: per-sample sequence numbers, if they are None the samples are taken as consecutive.
+            now: arrival time of the block (secs, monotonic), by default the current one.
+        """
+        if sequence is None:
+            index = self.next + np.arange(n, dtype=np.int64)
+        else:
+            steps = self.unwrap(np.asarray(sequence, dtype=np.int64))
+            missing = steps[steps > 1] - 1
+            if len(missing) > 0:
+                lost = int(missing.sum())
+                self.dropped += lost
+                self.gaps += len(missing)
+                self.emit("dropped", lost)
+            index = self.next - 1 + np.cumsum(steps)
+        if n > 0:
+            last = int(index[-1]) + 1
+            self.estimate(last - self.next, now)
+            self.next = last
+        return index
+
+    def nextIndex(self, now: float = None) -> int:
+        """Returns the index of a single sample without sequence number.
+
+        Args:
+            now: arrival time of the sample (secs, monotonic), by default the current one (only read on timestamps).
+        """
+        index = self.next
+        self.next += 1
+        self.total += 1
+        if not self.sampleRate:
+            self.pending += 1
+            if self.pending >= self.stride:
+                now = time.monotonic() if now is None else now
+                if self.lastStamp is not None and now > self.lastStamp:
+                    seen = self.pending / (now - self.lastStamp)
+                    self.stride = min(max(1, int(seen * self.stampInterval)), self.maxStride)
+                else:
+                    self.stride = self.maxStride
+                self.estimator.update(self.pending, now)
+                self.pending = 0
+                self.lastStamp = now
+        return index
+
+    def estimate(self, n: int, now: float = None):
+        """Counts n new samples of a block and timestamps them (with the pending single ones) for the rate estimation.
+
+        Args:
+            n: number of samples of the block.
+            now: arrival time of the block (secs, monotonic), by default the current one.
+        """
+        self.total += n
+        if not self.sampleRate:
+            self.estimator.update(self.pending + n, now)
+            self.pending = 0
+            self.lastStamp = self.estimator.points[-1][0]
+
+    def seconds(self, index) -> np.ndarray:
+        """Converts sample indexes to time (secs) from the first sample."""
+        index = np.asarray(index, dtype=np.float64)
+        rate = self.rate()
+        if rate == 0:
+            return np.zeros_like(index)
+        return index / rate
+
+
+class FramePacer:
+    """Adaptive frame interval of a render loop, between a floor and a ceiling frame rate.
+
+    A frame is only drawn when its data changed. After a drawn frame the next one
+    comes as soon as the ceiling and the drawing cost allow (the drawing takes at
+    most `budget` of the time), every tick without changes doubles the interval
+    up to the floor, so the loop follows the data arrival and an idle loop
+    barely uses CPU.
+
+    Args:
+        minFps: floor frame rate (the polling rate while idle).
+        maxFps: ceiling frame rate.
+        budget: max fraction of the time spent drawing (0-1).
+        smoothing: weight of the last frame on the average frame time (0-1).
+    """
+    def __init__(self, minFps: float = 2, maxFps: float = 60, budget: float = 0.5, smoothing: float = 0.2):
+        self.minFps = minFps
+        self.maxFps = maxFps
+        self.budget = budget
+        self.smoothing = smoothing
+        self.frames = deque()
+        self.clear()
+
+    def clear(self):
+        """Restarts the measurements, the next frame comes at the ceiling rate."""
+        self.period = 1 / self.maxFps
+        self.cost = None
+        self.started = None
+        self.frames.clear()
+
+    def begin(self):
+        """Marks the start of a tick."""
+        self.started = time.perf_counter()
+
+    def end(self, drawn: bool):
+        """Marks the end of a tick and updates the interval.
+
+        Args:
+            drawn: was a frame drawn on this tick?
+        """
+        now = time.perf_counter()
+        if drawn:
+            cost = now - self.started
+            self.cost = cost if self.cost is None else self.cost + self.smoothing * (cost - self.cost)
+            self.frames.append(now)
+            self.period = self.cost / self.budget
+        else:
+            self.period *= 2
+        self.period = min(max(self.period, 1 / self.maxFps), 1 / self.minFps)
+        while len(self.frames) > 0 and now - self.frames[0] > 1:
+            self.frames.popleft()
+
+    def interval(self) -> int:
+        """Returns the time until the next tick (ms)."""
+        return round(1000 * self.period)
+
+    def fps(self) -> float:
+        """Returns the frames drawn over the last second."""
+        while len(self.frames) > 0 and time.perf_counter() - self.frames[0] > 1:
+            self.frames.popleft()
+        return len(self.frames)
+
+    def frameTime(self) -> float:
+        """Returns the average time of a drawn frame (secs), 0 before the first one."""
+        return self.cost or 0.0
@@ -0,0 +1,169 @@
+import numpy as np
+
+from .sevent import Emitter
+
+
+class Trigger(Emitter):
+    """An edge trigger over a stream of samples, it captures fixed-length frames around the trigger point.
+
+    Every new block is searched for edges at once with numpy, the hysteresis state is
+    carried between blocks so an edge split by two blocks is not lost.
+
+    Args:
+        length: samples per frame.
+        level: trigger level.
+        edge: 'rising' or 'falling'.
+        hysteresis: the signal must cross level -/+ hysteresis (rising/falling) before a new edge is armed.
+        holdoff: min number of samples between two triggers.
+        preTrigger: percentage of the frame before the trigger point (0-100).
+        mode: 'auto' (free runs when there is no trigger), 'normal' or 'single' (one frame until arm()).
+    Events:
+        frame: it's emitted with a new frame and the position of the trigger point on it (None on free run).
+    """
+    def __init__(
+        self,
+        length: int = 200,
+        level: float = 2.5,
+        edge: str = "rising",
+        hysteresis: float = 0.0,
+        holdoff: int = 0,
+        preTrigger: float = 50,
+        mode: str = "auto",
+    ):
+        super().__init__()
+        self.length = length
+        self.level = level
+        self.edge = edge
+        self.hysteresis = hysteresis
+        self.holdoff = holdoff
+        self.preTrigger = preTrigger
+        self.mode = mode
+        self.clear()
+
+    def clear(self):
+        """Discards the history and re-arms the trigger."""
+        self.history = np.empty(0)
+        self.start = 0
+        self.count = 0
+        self.state = -1
+        self.lastTrigger = None
+        self.pending = None
+        self.lastFrameAt = 0
+        self.armed = True
+        self.frame = None
+        self.framePosition = None
+        self.newFrame = False
+
+    def arm(self):
+        """Re-arms the trigger (single mode)."""
+        self.armed = True
+        self.pending = None
+
+    def setLength(self, length: int):
+        """Updates the frame length."""
+        self.length = length
+        self.pending = None
+
+    def preSamples(self) -> int:
+        """Returns the number of samples of the frame before the trigger point."""
+        return int(self.length * min(max(self.preTrigger, 0), 100) / 100)
+
+    def edges(self, block: np.ndarray) -> np.ndarray:
+        """Returns the positions on the block where a trigger edge happens."""
+        if self.edge == "rising":
+            fire = block >= self.level
+            rearm = block < self.level - self.hysteresis
+        else:
+            fire = block <= self.level
+            rearm = block > self.level + self.hysteresis
+
+        # State after each sample: 1 fired, 0 armed, held while between both thresholds
+        state = np.full(len(block), -1, dtype=np.int8)
+        state[rearm] = 0
+        state[fire] = 1
+        known = np.where(state >= 0, np.arange(len(block)), -1)
+        np.maximum.accumulate(known, out=known)
+        state = np.where(known >= 0, state[np.maximum(known, 0)], self.state)
+        before = np.concatenate(([self.state], state[:-1]))
+        self.state = int(state[-1])
+        return np.flatnonzero((state == 1) & (before == 0))
+
+    def search(self, candidates: np.ndarray):
+        """Returns the last trigger point with a complete frame, honoring the holdoff."""
+        pre = self.preSamples()
+        post = self.length - pre
+        holdoff = max(self.holdoff, 1)
+        chosen = None
+        self.pending = None
+        i = 0
+        if self.lastTrigger is not None:
+            i = np.searchsorted(candidates, self.lastTrigger + holdoff)
+        while i < len(candidates) and self.armed:
+            point = int(candidates[i])
+            if point - pre < self.start:
+                i += 1
+                continue
+            if point + post > self.count:
+                self.pending = point
+                break
+            chosen = point
+            self.lastTrigger = point
+            if self.mode == "single":
+                self.armed = False
+                break
+            i = np.searchsorted(candidates, point + holdoff)
+        return chosen
+
+    def feed(self, block) -> bool:
+        """Processes a new block of samples.
+
+        Args:
+            block: list/array with the new samples.
+        Returns:
+            True if a new frame was captured.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if len(block) == 0:
+            return False
+        candidates = self.edges(block) + self.count
+        if self.pending is not None:
+            candidates = np.concatenate(([self.pending], candidates))
+        self.history = np.concatenate((self.history, block))
+        self.count += len(block)
+
+        pre = self.preSamples()
+        point = self.search(candidates)
+        captured = False
+        if point is not None:
+            begin = point - pre - self.start
+            self.setFrame(self.history[begin:begin + self.length], pre)
+            captured = True
+        elif self.mode == "auto" and self.count - self.lastFrameAt >= 2 * self.length:
+            self.setFrame(self.history[-self.length:], None)
+            captured = True
+
+        # Keeps what a future frame can need
+        keepFrom = self.count - self.length
+        if self.pending is not None:
+            keepFrom = min(keepFrom, self.pending - pre)
+        keepFrom = max(keepFrom, self.start)
+        self.history = self.history[keepFrom - self.start:]
+        self.start = keepFrom
+        return captured
+
+    def setFrame(self, frame: np.ndarray, position):
+        """Stores and emits a new frame."""
+        self.frame = frame.copy()
+        self.framePosition = position
+        self.lastFrameAt = self.count
+        self.newFrame = True
+        self.emit("frame", self.frame, position)
+
+    def hasNewFrame(self) -> bool:
+        """Checks if a frame was captured since the last getFrame()."""
+        return self.newFrame
+
+    def getFrame(self):
+        """Returns the last captured frame."""
+        self.newFrame = False
+        return self.frame
@@ -1,10 +1,16 @@
 import numpy as np
 import time
+import warnings
 
 
 class SamplerTimeCounter:
-    """Records the time interval between samples."""
+    """Records the time interval between samples.
+
+    Deprecated: it takes the host clock on every sample and its frequency is the inverse
+    of a single interval, use timing.SampleClock (or timing.RateEstimator) instead.
+    """
     def __init__(self):
+        warnings.warn("SamplerTimeCounter is deprecated, use timing.SampleClock instead", DeprecationWarning, stacklevel=2)
         self.lastTime = 0
         self.currentTime = 0
         self.elapsed = 0
@@ -81,14 +87,29 @@ class TimerCount:
         self.ready = False
         
 
-def magnitudeSpectrum(x, dt=1, Fs=1):
+def magnitudeSpectrum(x, dt=1, Fs=None):
+    """Calculates the one-sided magnitude spectrum of a signal.
+
+    Args:
+        x: signal samples.
+        dt: sample interval (secs), used when Fs is not given.
+        Fs: sample frequency (Hz).
+    Returns:
+        the frequency axis (Hz) and the magnitude of each frequency, both empty if x is empty.
+    """
+    if Fs is None:
+        Fs = 1 / dt
     N = len(x)
-    T = int(Fs * N)
-    f = np.linspace(0, Fs, N / 2 )
-    xf = np.fft.fft(x)
-    mag = (2.0 / N) * np.abs(xf[: N // 2])
-    return mag
+    if N == 0:
+        return np.empty(0), np.empty(0)
+    f = np.fft.rfftfreq(N, 1 / Fs)
+    mag = (2.0 / N) * np.abs(np.fft.rfft(x))
+    mag[0] /= 2
+    if N % 2 == 0:
+        mag[-1] /= 2
+    return f, mag
 
-def dbScale(x):
-    xdb = 20 * np.log10(x)
-    return xdb
\ No newline at end of file
+def dbScale(x, floor=1e-12):
+    """Converts a magnitude to decibels, values under floor are clipped."""
+    xdb = 20 * np.log10(np.maximum(x, floor))
+    return xdb
@@ -0,0 +1,295 @@
+import time
+from threading import Thread, Event
+
+import numpy as np
+
+from .sevent import Emitter
+from .capture import Capture
+from .protocol import ADC_SCALE, SAMPLE_SEQUENCE_MODULO
+from .emulator import SamplerEmulator
+
+
+class WaveformSource:
+    """A synthetic waveform generator.
+
+    Args:
+        kind: 'sine', 'square', 'noise' or 'chirp'.
+        rate: sample frequency (Hz).
+        frequency: signal frequency (Hz), the start frequency of the chirp.
+        amplitude: peak amplitude (V).
+        offset: dc offset (V).
+        chirpEnd: end frequency of the chirp (Hz).
+        chirpTime: duration of a chirp sweep (secs), it's repeated.
+        noise: std of the gaussian noise added to the signal (V).
+        seed: seed of the noise generator.
+    """
+    def __init__(
+        self,
+        kind: str = "sine",
+        rate: float = 1000,
+        frequency: float = 5,
+        amplitude: float = 2,
+        offset: float = 2.5,
+        chirpEnd: float = 100,
+        chirpTime: float = 1,
+        noise: float = 0,
+        seed: int = None,
+    ):
+        if kind not in ("sine", "square", "noise", "chirp"):
+            raise ValueError(f"Not valid waveform: {kind}")
+        self.kind = kind
+        self.rate = rate
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.offset = offset
+        self.chirpEnd = chirpEnd
+        self.chirpTime = chirpTime
+        self.noise = noise
+        self.random = np.random.default_rng(seed)
+        self.position = 0
+
+    def rewind(self):
+        """Goes back to the first sample."""
+        self.position = 0
+
+    def read(self, n: int) -> np.ndarray:
+        """Returns the next n samples."""
+        t = (self.position + np.arange(n)) / self.rate
+        self.position += n
+        if self.kind == "sine":
+            y = np.sin(2 * np.pi * self.frequency * t)
+        elif self.kind == "square":
+            y = np.where((t * self.frequency) % 1 < 0.5, 1.0, -1.0)
+        elif self.kind == "chirp":
+            tau = t % self.chirpTime
+            k = (self.chirpEnd - self.frequency) / self.chirpTime
+            y = np.sin(2 * np.pi * (self.frequency * tau + k * tau ** 2 / 2))
+        else:
+            y = self.random.uniform(-1, 1, n)
+        y = self.offset + self.amplitude * y
+        if self.noise > 0:
+            y += self.random.normal(0, self.noise, n)
+        return y
+
+
+class ReplaySource:
+    """Reads the samples of one channel of a capture file (see recorder.py).
+
+    Args:
+        filepath: capture file.
+        channel: channel name, by default the first one.
+        rate: sample frequency (Hz), by default the one of the capture.
+        loop: starts again at the end of the capture?
+    """
+    def __init__(self, filepath: str, channel: str = None, rate: float = None, loop: bool = True):
+        self.capture = Capture(filepath)
+        self.channel = self.capture.channel(channel or self.capture.channels[0])
+        self.rate = rate or self.capture.sampleRate or 1000
+        self.loop = loop
+        self.position = 0
+
+    def rewind(self):
+        """Goes back to the first sample."""
+        self.position = 0
+
+    def isFinished(self) -> bool:
+        """Checks if every sample was read (it never ends on loop)."""
+        return not self.loop and self.position >= len(self.channel)
+
+    def read(self, n: int) -> np.ndarray:
+        """Returns the next n samples, or less at the end of the capture when loop is disabled."""
+        total = len(self.channel)
+        parts = []
+        while n > 0 and total > 0:
+            if self.position >= total:
+                if not self.loop:
+                    break
+                self.position = 0
+            stop = min(self.position + n, total)
+            parts.append(np.array(self.channel[self.position:stop], dtype=np.float64))
+            n -= stop - self.position
+            self.position = stop
+        return np.concatenate(parts) if len(parts) > 0 else np.empty(0)
+
+    def close(self):
+        """Closes the capture file."""
+        self.channel = None
+        self.capture.close()
+
+
+class VirtualSerial(Emitter):
+    """A software device with the events of `Serial`, it emits the samples of a source
+    (a synthetic waveform or a capture replay), for profiling without hardware.
+
+    Args:
+        name: device name.
+        source: a WaveformSource/ReplaySource, by default a 5 Hz sine at 1 kHz.
+        mode: 'line' (one sample per event), 'chunked' (blocks of samples) or
+            'binary' (blocks of ADC quantized samples with their sequence numbers).
+        realtime: emit at the source rate? otherwise blocks are emitted as fast as possible.
+        blockTime: time between blocks on realtime (secs).
+        blockSize: samples per block when it's not realtime.
+        port: name reported as the port device.
+        emitterIsEnabled: disable on/emit events (callbacks execution).
+        emitAsDict: emit events on dict format {'emitter_name': data} ?
+    Events:
+        data: it's emitted with every sample as text (line mode).
+        data-block: it's emitted with a numpy array of samples per block (chunked/binary mode),
+            on binary mode a second array has the sequence number of every sample.
+        connection: it's emitted when the connection status is updated.
+        ports: it's emitted once, with the virtual port, when it starts.
+    """
+    def __init__(
+        self,
+        name: str = "default",
+        source=None,
+        mode: str = "chunked",
+        realtime: bool = True,
+        blockTime: float = 0.01,
+        blockSize: int = 4096,
+        port: str = "virtual",
+        emitterIsEnabled: bool = True,
+        emitAsDict: bool = True,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(emitterIsEnabled=emitterIsEnabled, *args, **kwargs)
+        self.name = name
+        self.source = source or WaveformSource()
+        self.mode = mode
+        self.realtime = realtime
+        self.blockTime = blockTime
+        self.blockSize = blockSize
+        self.port = port
+        self.emitAsDict = emitAsDict
+        self.connected = False
+        self.lastConnectionState = False
+        self.sent = 0
+        self.thread = Thread(target=self.run, name="virtual-serial-thread", daemon=True)
+        self.running = Event()
+        self.pauseEvent = Event()
+        self.resume()
+
+    def isConnected(self):
+        """Checks if the virtual device is connected."""
+        return self.connected
+
+    def isOpen(self):
+        """Checks if the virtual device is connected."""
+        return self.connected
+
+    def getPort(self):
+        """Returns the virtual port."""
+        return self.port if self.connected else None
+
+    def setPort(self, port: str = None):
+        """Connects the virtual device (any port name is accepted)."""
+        if port is not None:
+            self.port = port
+            self.connect()
+
+    def ports(self):
+        """Returns a list with the virtual port."""
+        return [self.port]
+
+    def connect(self):
+        """Connects the virtual device."""
+        self.connected = True
+
+    def disconnect(self, force: bool = False):
+        """Disconnects the virtual device."""
+        self.connected = False
+
+    def write(self, message="", end: str = "\n", asJson: bool = False):
+        """Messages to the virtual device are discarded."""
+        pass
+
+    def resume(self):
+        """Resumes the emit loop."""
+        self.pauseEvent.set()
+
+    def pause(self):
+        """Pauses the emit loop."""
+        self.pauseEvent.clear()
+
+    def setPause(self, value: bool = True):
+        """Updates the pause/resume state."""
+        if value:
+            self.pause()
+        else:
+            self.resume()
+
+    def checkConnectionStatus(self):
+        """Checks if the connection status changes."""
+        if self.lastConnectionState != self.connected:
+            status = self.connected
+            if self.emitAsDict:
+                status = {self.name: status}
+            self.emit("connection", status)
+            self.lastConnectionState = self.connected
+
+    def emitBlock(self, samples: np.ndarray):
+        """Emits a block of samples on the configured mode."""
+        if self.mode == "line":
+            for value in samples:
+                data = f"{value:.2f}"
+                self.emit("data", {self.name: data} if self.emitAsDict else data)
+            return
+        if self.mode == "binary":
+            counts = np.clip(np.rint(samples / ADC_SCALE), 0, 1023)
+            sequence = (self.sent + np.arange(len(samples))) % SAMPLE_SEQUENCE_MODULO
+            data = counts * ADC_SCALE
+            self.emit("data-block", {self.name: data} if self.emitAsDict else data, sequence)
+            return
+        self.emit("data-block", {self.name: samples} if self.emitAsDict else samples)
+
+    def run(self):
+        """Here the emit loop is executed."""
+        self.connect()
+        self.emit("ports", self.ports())
+        t0 = time.monotonic()
+        while self.running.is_set():
+            self.checkConnectionStatus()
+            if self.connected:
+                if self.realtime:
+                    due = int((time.monotonic() - t0) * self.source.rate) - self.sent
+                else:
+                    due = self.blockSize
+                if due > 0:
+                    samples = self.source.read(due)
+                    if len(samples) > 0:
+                        self.emitBlock(samples)
+                    self.sent += due
+                    if len(samples) < due:
+                        self.disconnect()
+            if self.realtime or not self.connected:
+                time.sleep(self.blockTime)
+            if not self.pauseEvent.is_set():
+                self.pauseEvent.wait()
+                t0 = time.monotonic() - self.sent / self.source.rate
+
+    def start(self):
+        """Starts the emit loop."""
+        self.running.set()
+        self.thread.start()
+
+    def stop(self):
+        """Stops the emit loop."""
+        self.resume()
+        self.disconnect()
+        if self.running.is_set():
+            self.running.clear()
+            self.thread.join()
+
+
+def virtualPty(source=None, binary: bool = False, blockTime: float = 0.01) -> SamplerEmulator:
+    """Returns a (not started) SamplerEmulator that writes the samples of a source on a pty pair,
+    so the real `Serial` read path can be exercised, its port is `emulator.port`.
+
+    Args:
+        source: a WaveformSource/ReplaySource, by default a 5 Hz sine at 1 kHz.
+        binary: send binary frames instead of text lines?
+        blockTime: time between writes to the pty (secs).
+    """
+    source = source or WaveformSource()
+    return SamplerEmulator(source.rate, binary, blockTime=blockTime, source=source)
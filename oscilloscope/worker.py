@@ -0,0 +1,368 @@
+"""
+Analysis worker process.
+
+The GUI thread copies every drained block once to a ring on shared memory
+(SharedRing), a worker process maps the same memory and runs the DSP stages
+on the new rows, on its own core and GIL, so a heavy analysis doesn't delay
+the serial reads or the frames. Only compact results (spectra, measurements)
+come back through a queue.
+
+    worker = AnalysisWorker(channels=1, stages={"spectrum": {"nperseg": 256}, "measurements": {"window": 200}})
+    worker.start()
+    worker.write(block, sampleRate)   # producer side (GUI thread)
+    results = worker.results()        # {"spectrum": (f, magnitude), "measurements": {...}}
+    worker.stop()
+"""
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .measurements import Measurements
+from .spectrum import SpectrumAnalyzer
+
+
+HEADER_SIZE = 64 # bytes before the rows: head and writing counters (int64) and sample rate (float64)
+
+
+class SharedRing:
+    """A single-producer ring of (rows x channels) samples on shared memory.
+
+    The writer publishes the end of the block it's going to write (`writing`),
+    copies it on the ring and then publishes the head (total rows written), it
+    never waits for the readers. Every reader maps the same memory and keeps its
+    own position, starting at the oldest row on the ring. After copying, a reader
+    checks its rows against `writing` (seqlock style): the rows whose slots were
+    being overwritten meanwhile, or that fell more than the capacity behind, are
+    dropped and counted on `lost`.
+
+    Args:
+        capacity: rows of the ring.
+        channels: columns of every row.
+        name: name of an existing ring to attach to, a new one is created if it's None.
+    """
+    def __init__(self, capacity: int = 65536, channels: int = 1, name: str = None):
+        self.capacity = capacity
+        self.channels = channels
+        self.owner = name is None
+        size = HEADER_SIZE + capacity * channels * np.dtype(np.float64).itemsize
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.head = np.ndarray((1,), np.int64, self.memory.buf, 0)
+        self.rate = np.ndarray((1,), np.float64, self.memory.buf, 8)
+        self.writing = np.ndarray((1,), np.int64, self.memory.buf, 16)
+        self.array = np.ndarray((capacity, channels), np.float64, self.memory.buf, HEADER_SIZE)
+        self.empty = np.empty((0, channels))
+        if self.owner:
+            self.head[0] = 0
+            self.rate[0] = 0
+            self.writing[0] = 0
+        self.position = max(int(self.head[0]) - capacity, 0)
+        self.lost = 0
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the shared memory block."""
+        return self.memory.name
+
+    def write(self, block, sampleRate: float = None):
+        """Writes a block of rows (producer side).
+
+        Args:
+            block: (rows x channels) array, or a 1-D array on a single channel ring.
+            sampleRate: sample frequency (Hz) published for the readers.
+        """
+        block = np.asarray(block, dtype=np.float64).reshape(-1, self.channels)
+        head = int(self.head[0])
+        n = len(block)
+        if n > self.capacity:
+            head += n - self.capacity
+            block = block[n - self.capacity:]
+            n = self.capacity
+        self.writing[0] = head + n
+        start = head % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self.array[start:end] = block
+        else:
+            first = self.capacity - start
+            self.array[start:] = block[:first]
+            self.array[:n - first] = block[first:]
+        if sampleRate:
+            self.rate[0] = sampleRate
+        self.head[0] = head + n
+
+    def read(self) -> np.ndarray:
+        """Returns a copy of the rows written since the last read (reader side)."""
+        head = int(self.head[0])
+        n = head - self.position
+        if n == 0:
+            return self.empty
+        if n > self.capacity:
+            self.lost += n - self.capacity
+            self.position = head - self.capacity
+            n = self.capacity
+        start = self.position % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            rows = self.array[start:end].copy()
+        else:
+            rows = np.concatenate((self.array[start:], self.array[:end - self.capacity]))
+
+        # The oldest rows could be overwritten by a write started while they were copied
+        overrun = min(int(self.writing[0]) - self.capacity - self.position, n)
+        if overrun > 0:
+            self.lost += overrun
+            rows = rows[overrun:]
+        self.position = head
+        return rows
+
+    def last(self, n: int) -> np.ndarray:
+        """Returns a copy of the last n rows already read (reader side), fewer if they were overwritten."""
+        n = min(n, self.position, self.capacity)
+        if n <= 0:
+            return self.empty
+        first = self.position - n
+        start = first % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            rows = self.array[start:end].copy()
+        else:
+            rows = np.concatenate((self.array[start:], self.array[:end - self.capacity]))
+        overrun = min(int(self.writing[0]) - self.capacity - first, n)
+        return rows[overrun:] if overrun > 0 else rows
+
+    def sampleRate(self) -> float:
+        """Returns the last published sample frequency (Hz), 0 if it is not known."""
+        return float(self.rate[0])
+
+    def close(self):
+        """Unmaps the memory, the owner also releases it."""
+        if self.memory is None:
+            return
+        self.head = self.rate = self.writing = self.array = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
+
+
+class SpectrumStage:
+    """Welch spectrum of one channel (see SpectrumAnalyzer), its result is (f, magnitude).
+
+    Args:
+        channel: column of the analyzed channel.
+        **kwargs: settings of the SpectrumAnalyzer (nperseg, window, ...).
+    """
+    def __init__(self, channel: int = 0, **kwargs):
+        self.channel = channel
+        self.analyzer = SpectrumAnalyzer(**kwargs)
+
+    def backlog(self) -> int:
+        """Returns the number of recent rows fed when the stage is (re)started, none (fresh averages)."""
+        return 0
+
+    def feed(self, rows: np.ndarray, sampleRate: float):
+        """Transforms the new rows."""
+        self.analyzer.setSampleRate(sampleRate or 1)
+        self.analyzer.feed(rows[:, self.channel])
+
+    def result(self):
+        """Returns the new spectrum, None if it didn't change."""
+        if not self.analyzer.changed:
+            return None
+        return self.analyzer.spectrum()
+
+
+class MeasurementsStage:
+    """Scope measurements of one channel (see Measurements), its result is the dict of values.
+
+    Args:
+        channel: column of the measured channel.
+        **kwargs: settings of the Measurements (window, level, ...).
+    """
+    def __init__(self, channel: int = 0, **kwargs):
+        self.channel = channel
+        self.measurements = Measurements(**kwargs)
+        self.changed = False
+
+    def backlog(self) -> int:
+        """Returns the number of recent rows fed when the stage is (re)started, a full window."""
+        return self.measurements.window
+
+    def feed(self, rows: np.ndarray, sampleRate: float):
+        """Updates the measurements with the new rows."""
+        self.measurements.setSampleRate(sampleRate or None)
+        self.measurements.feed(rows[:, self.channel])
+        self.changed = True
+
+    def result(self):
+        """Returns the new measurements, None if they didn't change."""
+        if not self.changed:
+            return None
+        self.changed = False
+        return self.measurements.values()
+
+
+STAGES = {
+    "spectrum": SpectrumStage,
+    "measurements": MeasurementsStage,
+}
+
+
+def startStage(name: str, settings: dict, ring: SharedRing):
+    """Creates a stage and feeds it the recent rows of the ring it needs (see backlog)."""
+    stage = STAGES[name](**settings)
+    rows = ring.last(stage.backlog())
+    if len(rows) > 0:
+        stage.feed(rows, ring.sampleRate())
+    return stage
+
+
+def runStages(ringName: str, capacity: int, channels: int, stages: dict, results, control, stopEvent, interval: float):
+    """Worker process loop: feeds the new rows of the ring to every stage and publishes the
+    new results at most once per interval. `control` has (name, settings) messages, a stage
+    is restarted with its new settings (or removed when they are None), the others go on."""
+    ring = SharedRing(capacity, channels, ringName)
+    pipeline = {name: startStage(name, settings, ring) for name, settings in stages.items()}
+    try:
+        while not stopEvent.is_set():
+            try:
+                while True:
+                    name, settings = control.get_nowait()
+                    if settings is None:
+                        pipeline.pop(name, None)
+                    else:
+                        pipeline[name] = startStage(name, settings, ring)
+            except queue.Empty:
+                pass
+            rows = ring.read()
+            if len(rows) > 0:
+                sampleRate = ring.sampleRate()
+                output = {}
+                for name, stage in pipeline.items():
+                    stage.feed(rows, sampleRate)
+                    value = stage.result()
+                    if value is not None:
+                        output[name] = value
+                if len(output) > 0:
+                    output["lost"] = ring.lost
+                    # A late consumer only needs the newest results, the oldest one is discarded
+                    try:
+                        results.put_nowait(output)
+                    except queue.Full:
+                        try:
+                            results.get_nowait()
+                        except queue.Empty:
+                            pass
+                        results.put_nowait(output)
+            stopEvent.wait(interval)
+    finally:
+        ring.close()
+
+
+class AnalysisWorker:
+    """Runs DSP stages on a separate process over a SharedRing.
+
+    Args:
+        channels: columns of the blocks.
+        stages: dict with the settings of every stage by name ('spectrum', 'measurements'),
+            e.g. {"spectrum": {"channel": 0, "nperseg": 256}}, by default both with their defaults.
+        capacity: rows of the shared ring, the worker loses the oldest rows if it falls behind more than this.
+        interval: polling time of the worker (secs), the results are published at most once per interval.
+        maxResults: pending results before the oldest ones are discarded (the consumer is late).
+    """
+    def __init__(
+        self,
+        channels: int = 1,
+        stages: dict = None,
+        capacity: int = 65536,
+        interval: float = 0.05,
+        maxResults: int = 8,
+    ):
+        if stages is None:
+            stages = {"spectrum": {}, "measurements": {}}
+        for name in stages:
+            if name not in STAGES:
+                raise ValueError(f"Not valid stage: {name}")
+        context = multiprocessing.get_context("spawn")
+        self.stages = {name: dict(settings) for name, settings in stages.items()}
+        self.enabled = set(self.stages)
+        self.ring = SharedRing(capacity, channels)
+        self.resultQueue = context.Queue(maxResults)
+        self.controlQueue = context.Queue()
+        self.stopEvent = context.Event()
+        self.process = context.Process(
+            target=runStages,
+            args=(self.ring.name, capacity, channels, self.stages, self.resultQueue, self.controlQueue, self.stopEvent, interval),
+            name="analysis-worker",
+            daemon=True,
+        )
+        self.lost = 0
+
+    def start(self):
+        """Starts the worker process."""
+        self.process.start()
+
+    def isAlive(self) -> bool:
+        """Checks if the worker process is running."""
+        return self.process.is_alive()
+
+    def write(self, block, sampleRate: float = None):
+        """Hands a block of rows off to the worker (it doesn't wait for it).
+
+        Args:
+            block: (rows x channels) array.
+            sampleRate: sample frequency (Hz) used by the stages.
+        """
+        self.ring.write(block, sampleRate)
+
+    def configure(self, name: str, **settings):
+        """Updates the settings of a stage, the worker restarts only that stage with them.
+
+        Args:
+            name: stage name.
+            **settings: settings to be updated.
+        """
+        if name not in STAGES:
+            raise ValueError(f"Not valid stage: {name}")
+        self.stages.setdefault(name, {}).update(settings)
+        if name in self.enabled:
+            self.controlQueue.put((name, dict(self.stages[name])))
+
+    def enable(self, name: str, enabled: bool = True):
+        """Starts (from scratch) or stops running a stage, its settings are kept.
+
+        Args:
+            name: stage name.
+            enabled: run the stage?
+        """
+        if name not in STAGES:
+            raise ValueError(f"Not valid stage: {name}")
+        if enabled:
+            self.enabled.add(name)
+            self.controlQueue.put((name, dict(self.stages.setdefault(name, {}))))
+        elif name in self.enabled:
+            self.enabled.discard(name)
+            self.controlQueue.put((name, None))
+
+    def results(self) -> dict:
+        """Returns the last result of every stage published since the previous call."""
+        latest = {}
+        try:
+            while True:
+                latest.update(self.resultQueue.get_nowait())
+        except queue.Empty:
+            pass
+        self.lost = latest.pop("lost", self.lost)
+        return latest
+
+    def stop(self, timeout: float = 1):
+        """Stops the worker process and releases the shared ring."""
+        if self.process.is_alive():
+            self.stopEvent.set()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.ring.close()
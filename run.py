@@ -1,20 +1,38 @@
 import sys
 import os
-from PyQt5.QtCore import QTimer
+import time
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QTimer, QRectF
 from PyQt5.QtCore import pyqtSignal
 from PyQt5 import uic
-from PyQt5.QtWidgets import QMainWindow, QApplication, QFileDialog
+from PyQt5.QtWidgets import QMainWindow, QApplication, QFileDialog, QLabel
 from oscilloscope.serialio import Serial
-from oscilloscope.buffer import Buffer
-from oscilloscope.utils import dbScale, SamplerTimeCounter, TimerCount
+from oscilloscope.buffer import MultipleBuffers
+from oscilloscope.handoff import SampleQueue
+from oscilloscope.trigger import Trigger
+from oscilloscope.decimation import MinMaxDecimator, decimate
+from oscilloscope.spectrum import Spectrogram
+from oscilloscope.timing import SampleClock, FramePacer
+from oscilloscope.worker import AnalysisWorker
+from oscilloscope.utils import dbScale, TimerCount
 
 
 pathUI = os.path.dirname(os.path.abspath(__file__))
 pathUI = os.path.join(pathUI, 'gui', 'main.ui')
+pathCaptures = os.path.join(os.path.dirname(pathUI), '..', 'captures')
 
 
-PEN_COLOR = (0, 190, 255)
-FPS = 15
+# Plotted channels, in the column order of the CSV lines sent by the device,
+# every channel is drawn as value * scale + offset
+CHANNELS = [
+    {'name': 'a0', 'color': (0, 190, 255), 'offset': 0.0, 'scale': 1.0},
+]
+MIN_FPS = 2 # idle polling rate
+MAX_FPS = 60
+DECIMATION = 'minmax' # 'minmax' | 'lttb'
+WATERFALL_HISTORY = 600 # columns
+WATERFALL_LEVELS = (-80, 20) # dB
 
 
 class Oscilloscope(QMainWindow):
@@ -25,44 +43,104 @@ class Oscilloscope(QMainWindow):
         self.__configureGraph()
         self.__configureSerial()
         self.__configureBuffer()
+        self.__configureTrigger()
         self.__configureButtons()
         self.__configureTimers()
 
     def __configureBuffer(self):
         """Configures the buffer."""
-        self.buffer = Buffer(maxlen=200)
+        self.buffer = MultipleBuffers([channel['name'] for channel in CHANNELS], maxlen=200, columnar=True)
+        self.queue = SampleQueue(channels=len(CHANNELS))
+        self.dropped = 0
+        self.decimators = [MinMaxDecimator(self.buffer.maxlen, self.pixels) for _ in CHANNELS]
+        self.rateClock = SampleClock()
+        self.spectrogram = Spectrogram(
+            nperseg=256,
+            history=WATERFALL_HISTORY,
+            levels=WATERFALL_LEVELS,
+            lut=pg.colormap.get('viridis').getLookupTable(),
+        )
+
+        # The spectrum and the measurements are computed by a worker process over a shared memory ring
+        self.worker = AnalysisWorker(
+            channels=len(CHANNELS),
+            stages={
+                'spectrum': {'nperseg': 256, 'window': 'hann'},
+                'measurements': {'window': self.buffer.maxlen},
+            },
+        )
+        self.worker.enable('spectrum', self.checkBox.isChecked())
+        self.spectrum = None
+        self.spectrumCount = 0
+        self.measures = None
+
+    def __configureTrigger(self):
+        """Configures the trigger and its controls."""
+        self.trigger = Trigger(length=self.buffer.maxlen, level=self.triggerLevel.value(), hysteresis=0.05)
+        self.triggerEdge.addItems(['rising', 'falling'])
+        self.triggerMode.addItems(['auto', 'normal', 'single'])
+        self.triggerCheck.toggled.connect(self.updateTriggerCheck)
+        self.triggerLevel.valueChanged.connect(lambda value: setattr(self.trigger, 'level', value))
+        self.triggerEdge.currentTextChanged.connect(lambda edge: setattr(self.trigger, 'edge', edge))
+        self.triggerMode.currentTextChanged.connect(self.updateTriggerMode)
 
     def __configureGraph(self):
         """Configures the signal graph."""
         self.graph.showGrid(x=True, y=True)
-        self.graph.setYRange(0, 5)
-        self.curve = self.graph.plot(pen=PEN_COLOR)
-        self.winSize.valueChanged.connect(lambda value: self.buffer.setNewLen(value))
+        self.graph.setYRange(*self.timeRange())
+        if len(CHANNELS) > 1:
+            self.graph.addLegend()
+        self.curves = [self.graph.plot(pen=channel['color'], name=channel['name']) for channel in CHANNELS]
+        self.waterfall = pg.ImageItem() # the spectrogram gives it the coloured columns
+        self.winSize.valueChanged.connect(self.updateWindowSize)
+        # Plot width (pixels) of the decimation, until the widget is laid out it's an estimate
+        self.pixels = self.graph.width()
+        self.graph.getViewBox().sigResized.connect(self.updatePlotWidth)
+        # Adaptive render loop: a single shot timer rescheduled by the pacer after every tick
+        self.pacer = FramePacer(MIN_FPS, MAX_FPS)
+        self.drawnVersion = None
+        self.renderLabel = QLabel()
+        self.statusBar().addPermanentWidget(self.renderLabel)
         self.graphTimer = QTimer()
+        self.graphTimer.setSingleShot(True)
         self.graphTimer.timeout.connect(self.updateGraph)
-        self.graphTimer.start(1000 // FPS) # 1000 // FPS
+        self.graphTimer.start(0)
 
     def __configureButtons(self):
         """Configures the GUI buttons."""
         self.connectBtn.clicked.connect(self.updatePortDevice)
+        self.checkBox.toggled.connect(self.updateGraphMode)
+        self.dbCheck.toggled.connect(lambda checked: self.invalidateFrame())
+        self.waterfallCheck.toggled.connect(self.updateWaterfallMode)
+        self.recordBtn.toggled.connect(self.updateRecording)
+        self.recordTimer = QTimer()
+        self.recordTimer.setSingleShot(True)
+        self.recordTimer.timeout.connect(lambda: self.recordBtn.setChecked(False))
 
     def __configureSerial(self):
         """Configures the serial device variables."""
         self.baudrates.addItems(['1200', '2400', '4800', '9600', '14400', '19200', '28800', '31250', '57600', '115200'])
         self.baudrates.setCurrentIndex(3)
-        self.serial = Serial(name="arduino", timeout=.5, emitAsDict=False)
+        self.serial = Serial(
+            name="arduino",
+            timeout=.5,
+            emitAsDict=False,
+            mode="csv",
+            channels=[channel['name'] for channel in CHANNELS],
+        )
         self.serial.on('connection', self.updateSerialConnectionStatus)
         self.serial.on('ports', self.updateListOfPorts)
-        self.serial.on('data', self.updateBuffer)
+        self.serial.on('data-block', self.updateBuffer)
         self.updateListOfPorts(self.serial.ports())
 
     def __configureTimers(self):
         """Configures timers."""
-        self.samplerTimerCounter = SamplerTimeCounter()
         self.frequencyLabelTimer = TimerCount(
             interval=1, 
-            callback = lambda: self.fsLabel.setText(f"{self.samplerTimerCounter.lastFrequency():.5f}")
+            callback = self.updateRateLabel
         )
+        self.measuresTimer = TimerCount(interval=0.5, callback=self.updateMeasures)
+        self.renderLabelTimer = TimerCount(interval=1, callback=self.updateRenderLabel)
 
     def updateSerialConnectionStatus(self, status: bool):
         """Updates the connection status on the GUI."""
@@ -73,21 +151,229 @@ class Oscilloscope(QMainWindow):
         self.devices.clear()
         self.devices.addItems(ports)
 
-    def updateBuffer(self, data: str):
-        """Updates signal buffer values."""
-        self.buffer.append(float(data))
+    def updateBuffer(self, data: np.ndarray):
+        """Hands the new (rows x channels) samples off to the GUI thread (runs on the serial thread),
+        stamped with their arrival time for the rate estimation."""
+        self.queue.put(data, time.monotonic())
+
+    def drainQueue(self):
+        """Moves the samples received since the last frame to the signal buffers and the analysis
+        worker, and takes its new results. The analysis, waterfall and trigger follow the first channel."""
+        block = self.queue.get()
+        for n, arrival in self.queue.arrivals():
+            self.rateClock.indices(n, now=arrival)
+        if len(block) > 0:
+            self.buffer.appendBlock(block)
+            for decimator, samples in zip(self.decimators, block.T):
+                decimator.feed(samples)
+            main = block[:, 0]
+            self.worker.write(block, self.rateClock.rate())
+            if self.waterfallCheck.isChecked():
+                self.spectrogram.feed(main)
+            if self.triggerCheck.isChecked():
+                self.trigger.feed(main)
+        results = self.worker.results()
+        if 'spectrum' in results:
+            self.spectrum = results['spectrum']
+            self.spectrumCount += 1
+        if 'measurements' in results:
+            self.measures = results['measurements']
+        if self.queue.dropped != self.dropped:
+            self.dropped = self.queue.dropped
+            self.statusBar().showMessage(f"Dropped samples: {self.dropped}")
         self.frequencyLabelTimer.update()
-        self.samplerTimerCounter.update()
+        self.measuresTimer.update()
+
+    def updateRateLabel(self):
+        """Shows the estimated sample rate, with its jitter and confidence as tooltip."""
+        estimator = self.rateClock.estimator
+        self.fsLabel.setText(f"{self.rateClock.rate():.5f}")
+        self.fsLabel.setToolTip(f"Jitter: {1000 * estimator.jitter():.3f} ms, confidence: {100 * estimator.confidence():.1f} %")
+
+    def updateRenderLabel(self):
+        """Shows the achieved frame rate and the average frame time."""
+        self.renderLabel.setText(f"{self.pacer.fps()} FPS, {1000 * self.pacer.frameTime():.1f} ms/frame")
+
+    def updateMeasures(self):
+        """Shows the last measurements of the current window."""
+        if self.measures is None:
+            return
+        m = self.measures
+        self.measuresLabel.setText(
+            f"Vpp: {m['vpp']:.3f} V  Mean: {m['mean']:.3f} V  RMS: {m['rms']:.3f} V\n"
+            f"Freq: {m['frequency']:.3f} Hz  Duty: {100 * m['duty']:.1f} %  Rise: {1000 * m['rise']:.3f} ms"
+        )
+
+    def timeRange(self):
+        """Returns the y range that shows the 0-5 V span of every channel."""
+        low = [channel['offset'] + min(0, 5 * channel['scale']) for channel in CHANNELS]
+        high = [channel['offset'] + max(0, 5 * channel['scale']) for channel in CHANNELS]
+        return min(low), max(high)
+
+    def plotCurves(self, points: list, scaled: bool = False):
+        """Updates every curve within one redraw, the curves without points are cleared.
+
+        Args:
+            points: a (x, y) tuple per channel, in the CHANNELS order.
+            scaled: apply the offset and scale of every channel?
+        """
+        self.graph.setUpdatesEnabled(False)
+        try:
+            for i, curve in enumerate(self.curves):
+                if i >= len(points):
+                    curve.clear()
+                    continue
+                x, y = points[i]
+                if scaled:
+                    y = y * CHANNELS[i]['scale'] + CHANNELS[i]['offset']
+                curve.setData(x, y, skipFiniteCheck=True)
+        finally:
+            self.graph.setUpdatesEnabled(True)
+
+    def updateGraph(self):
+        """Render loop tick: moves the new samples, draws a frame if they changed what is shown
+        and schedules the next tick."""
+        self.pacer.begin()
+        self.drainQueue()
+        drawn = self.drawFrame()
+        self.pacer.end(drawn)
+        self.renderLabelTimer.update()
+        self.graphTimer.start(self.pacer.interval())
+
+    def invalidateFrame(self):
+        """Forces a new frame on the next tick (e.g. after a change of mode), it comes right away."""
+        self.drawnVersion = None
+        self.graphTimer.start(0)
 
-    def updateGraph(self):   
-        """Plots the signal over the corresponding GUI element."""    
-        data = self.buffer.getData()
-        self.curve.setData(data)
+    def drawFrame(self) -> bool:
+        """Plots the signal over the corresponding GUI element, only when it changed since the
+        last frame. Returns True if a frame was drawn."""
+        # On waterfall mode only the new columns were computed and coloured, the image is a view of the ring
+        if self.waterfallCheck.isChecked():
+            if not self.spectrogram.changed:
+                return False
+            self.spectrogram.setSampleRate(self.rateClock.rate() or 1)
+            image = self.spectrogram.image()
+            self.waterfall.setImage(image, autoLevels=False)
+            width = len(image) * self.spectrogram.columnTime()
+            self.waterfall.setRect(QRectF(-width, 0, width, self.spectrogram.maxFrequency()))
+            return True
 
-        # When the buffer is full clear it
+        # On FFT mode only a new spectrum of the worker is plotted
+        if self.checkBox.isChecked():
+            if self.spectrum is None or self.drawnVersion == ('fft', self.spectrumCount):
+                return False
+            f, mag = self.spectrum
+            self.plotCurves([(f, dbScale(mag) if self.dbCheck.isChecked() else mag)])
+            self.drawnVersion = ('fft', self.spectrumCount)
+            return True
+
+        # On trigger mode only a new captured frame is plotted
+        if self.triggerCheck.isChecked():
+            if not self.trigger.hasNewFrame():
+                return False
+            self.plotCurves([decimate(self.trigger.getFrame(), self.pixels, DECIMATION)], scaled=True)
+            return True
+
+        # On roll mode the buffers are plotted when their change counter moved
+        if self.drawnVersion == ('roll', self.buffer.version):
+            return False
+
+        # Every channel is taken from the same snapshot, large windows are reduced to about 2 points per pixel
+        if DECIMATION == 'minmax' and self.buffer.lenOf(self.buffer.mainKey) > 2 * self.pixels:
+            points = [decimator.getData() for decimator in self.decimators]
+        else:
+            data = self.buffer.getArray()
+            if data.shape[1] <= 2 * self.pixels:
+                x = np.arange(data.shape[1])
+                points = [(x, y) for y in data]
+            else:
+                points = [decimate(y, self.pixels, DECIMATION) for y in data]
+        self.plotCurves(points, scaled=True)
+
+        # When the buffers are full clear them
         if self.buffer.isFull():
-            self.buffer.clear()
-        
+            self.buffer.clearAll()
+            for decimator in self.decimators:
+                decimator.clear()
+        self.drawnVersion = ('roll', self.buffer.version)
+        return True
+
+    def updateGraphMode(self, spectrum: bool):
+        """Switches between the time and the frequency domain, the spectrum stage only runs
+        on the frequency domain and starts from scratch."""
+        self.worker.enable('spectrum', spectrum)
+        self.spectrum = None
+        self.invalidateFrame()
+        if spectrum:
+            self.graphLabel.setText("Frequency Domain")
+            self.graph.enableAutoRange()
+        else:
+            self.graphLabel.setText("Time Domain")
+            self.graph.setYRange(*self.timeRange())
+
+    def updateWaterfallMode(self, waterfall: bool):
+        """Shows/hides the waterfall (time vs frequency) view."""
+        self.spectrogram.clear()
+        self.invalidateFrame()
+        if waterfall:
+            self.graphLabel.setText("Waterfall")
+            for curve in self.curves:
+                self.graph.removeItem(curve)
+            self.graph.addItem(self.waterfall)
+            self.graph.enableAutoRange()
+        else:
+            self.graph.removeItem(self.waterfall)
+            for curve in self.curves:
+                self.graph.addItem(curve)
+            self.updateGraphMode(self.checkBox.isChecked())
+
+    def updateRecording(self, recording: bool):
+        """Starts/stops streaming the signal to a capture file, during the record time if it is set."""
+        if recording:
+            filepath = os.path.join(pathCaptures, time.strftime("capture-%Y%m%d-%H%M%S.osc"))
+            self.buffer.startRecording(filepath, sampleRate=self.rateClock.rate() or None)
+            self.statusBar().showMessage(f"Recording: {os.path.abspath(filepath)}")
+            if self.spinBox.value() > 0:
+                self.recordTimer.start(self.spinBox.value() * 1000)
+            return
+        self.recordTimer.stop()
+        if self.buffer.isRecording():
+            filepath = self.buffer.recorder.filepath
+            self.buffer.stopRecording()
+            self.statusBar().showMessage(f"Saved: {os.path.abspath(filepath)}")
+
+    def updateWindowSize(self, value: int):
+        """Updates the length of the buffers and the trigger frames."""
+        self.buffer.setNewLen(value)
+        self.trigger.setLength(value)
+        for decimator in self.decimators:
+            decimator.setWindow(value, self.pixels)
+        self.worker.configure('measurements', window=value)
+        self.invalidateFrame()
+
+    def updatePlotWidth(self, *args):
+        """Updates the plot width of the decimators when the plot is resized, they are fed again with the current window."""
+        pixels = max(1, int(self.graph.getViewBox().width()))
+        if pixels == self.pixels:
+            return
+        self.pixels = pixels
+        data = self.buffer.getArray()
+        for decimator, samples in zip(self.decimators, data):
+            decimator.setWindow(self.buffer.maxlen, pixels)
+            decimator.feed(samples)
+        self.invalidateFrame()
+
+    def updateTriggerCheck(self, checked: bool):
+        """Enables/disables the trigger, the roll view is drawn again when it's disabled."""
+        self.trigger.clear()
+        self.invalidateFrame()
+
+    def updateTriggerMode(self, mode: str):
+        """Updates the trigger mode, re-arming it."""
+        self.trigger.mode = mode
+        self.trigger.arm()
+
     def updatePortDevice(self):
         """Updates a new value for the port device."""
         device = self.devices.currentText()
@@ -98,12 +384,18 @@ class Oscilloscope(QMainWindow):
             self.serial.disconnect(force=True)
     
     def start(self):
-        """Starts the serial read loop."""
+        """Starts the serial read loop and the analysis worker, the window must be shown."""
+        self.updatePlotWidth()
+        self.worker.start()
         self.serial.start()
 
-    def close(self, event):
-        """Stops serial thread."""
+    def closeEvent(self, event):
+        """Stops serial thread, the analysis worker and the recording when the window is closed."""
         self.serial.stop()
+        self.worker.stop()
+        self.recordTimer.stop()
+        self.buffer.stopRecording()
+        super().closeEvent(event)
 
 
 if __name__ == '__main__':
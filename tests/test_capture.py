@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from oscilloscope.buffer import MultipleBuffers
+from oscilloscope.capture import Capture, convertCsv, isCapture
+from oscilloscope.recorder import CHUNK_HEADER, Recorder, encodeChunk, encodeHeader
+
+
+def record(filepath, blocks, channels=("x", "y"), **kwargs):
+    recorder = Recorder(str(filepath), channels=list(channels), **kwargs)
+    recorder.start()
+    for block in blocks:
+        recorder.write(block)
+    recorder.stop()
+    return recorder
+
+
+def test_recorder_round_trip(tmp_path):
+    filepath = tmp_path / "capture.osc"
+    data = np.arange(3000, dtype=np.float32).reshape(-1, 2)
+    recorder = record(filepath, np.split(data, 10), sampleRate=500, chunkRows=256)
+    assert recorder.dropped == 0
+    assert isCapture(str(filepath))
+    with Capture(str(filepath)) as capture:
+        assert capture.channels == ["x", "y"]
+        assert capture.sampleRate == 500
+        assert len(capture) == len(data)
+        assert np.array_equal(capture.read(), data)
+        # ranges across the chunk boundaries
+        assert np.array_equal(capture.read(100, 900, [1]), data[100:900, 1:])
+        assert np.array_equal(capture["y"][250:260], data[250:260, 1])
+        assert capture["x"][-1] == data[-1, 0]
+        assert np.array_equal(capture.readTime(0.2, 0.4), data[100:200])
+
+
+def test_truncated_capture_is_read_up_to_the_last_complete_chunk(tmp_path):
+    filepath = tmp_path / "capture.osc"
+    data = np.arange(100, dtype=np.float32).reshape(-1, 1)
+    with open(filepath, "wb") as file:
+        file.write(encodeHeader(["x"], np.float32, 100))
+        for block in np.split(data, 4):
+            file.write(encodeChunk(block))
+    size = filepath.stat().st_size
+    with open(filepath, "r+b") as file:
+        file.truncate(size - 20)  # 8 bytes of samples and the padding
+    with Capture(str(filepath)) as capture:
+        assert len(capture) == 75
+        assert np.array_equal(capture.read(), data[:75])
+
+
+def test_zero_filled_chunks_are_not_served(tmp_path):
+    filepath = tmp_path / "capture.osc"
+    data = np.ones((30, 1), dtype=np.float32)
+    with open(filepath, "wb") as file:
+        file.write(encodeHeader(["x"], np.float32))
+        for block in np.split(data, 3):
+            file.write(encodeChunk(block))
+        # header written, samples lost (e.g. a crash before the data pages reached the disk)
+        chunk = bytearray(encodeChunk(data[:10]))
+        chunk[CHUNK_HEADER.size:] = bytes(len(chunk) - CHUNK_HEADER.size)
+        file.write(chunk)
+    with Capture(str(filepath)) as capture:
+        assert len(capture) == 30
+    with Capture(str(filepath), verify=True) as capture:
+        assert len(capture) == 30
+
+
+def test_verify_stops_at_the_first_corrupted_chunk(tmp_path):
+    filepath = tmp_path / "capture.osc"
+    with open(filepath, "wb") as file:
+        file.write(encodeHeader(["x"], np.float32))
+        for k in range(3):
+            chunk = bytearray(encodeChunk(np.full((10, 1), k, dtype=np.float32)))
+            if k == 1:
+                chunk[CHUNK_HEADER.size] ^= 0xFF
+            file.write(chunk)
+    with Capture(str(filepath), verify=True) as capture:
+        assert len(capture) == 10
+    with Capture(str(filepath)) as capture:
+        assert len(capture) == 30
+
+
+def test_convert_csv_and_load(tmp_path):
+    csvpath = tmp_path / "legacy.csv"
+    filepath = tmp_path / "legacy.osc"
+    t = np.arange(50) / 100
+    pd.DataFrame({"x": np.sin(t), "t": t}).to_csv(csvpath)
+    convertCsv(str(csvpath), str(filepath), chunkRows=16)
+    with Capture(str(filepath)) as capture:
+        assert capture.channels == ["x", "t"]
+        assert capture.sampleRate == pytest.approx(100)
+        assert len(capture) == 50
+
+    for columnar in (False, True):
+        buffers = MultipleBuffers(["x"], columnar=columnar)
+        buffers.load(str(filepath))
+        assert np.asarray(buffers.getDataOf("x")) == pytest.approx(np.sin(t), abs=1e-6)
+        assert np.asarray(buffers.getTime()) == pytest.approx(t, abs=1e-6)
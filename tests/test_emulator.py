@@ -0,0 +1,88 @@
+import sys
+import time
+from threading import Lock
+
+import numpy as np
+import pytest
+
+from oscilloscope.protocol import ADC_SCALE, SAMPLE_SEQUENCE_MODULO
+from oscilloscope.serialio import Serial
+from oscilloscope.virtual import WaveformSource, virtualPty
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the emulator needs a pty pair")
+
+RATE = 2000
+COUNT = 400
+
+
+def expected(n: int) -> np.ndarray:
+    """The voltages the emulator sends for the first n samples of the test waveform."""
+    values = WaveformSource("sine", RATE, frequency=10).read(n)
+    return np.clip(np.rint(values / ADC_SCALE), 0, 1023) * ADC_SCALE
+
+
+def stream(mode: str, binary: bool = False, count: int = COUNT, timeout: float = 5):
+    """Runs the emulator through a Serial device until `count` samples arrive.
+
+    Returns:
+        the received samples and the sequence numbers of the binary mode.
+    """
+    emulator = virtualPty(WaveformSource("sine", RATE, frequency=10), binary=binary, blockTime=0.005)
+    serial = Serial(
+        port=emulator.port,
+        baudrate=1000000,
+        timeout=0.01,
+        reconnectDelay=0.05,
+        portsRefreshTime=0,
+        emitAsDict=False,
+        mode=mode,
+    )
+    lock = Lock()
+    samples = []
+    sequences = []
+
+    def onLine(data):
+        with lock:
+            samples.append(float(data))
+
+    def onBlock(data, sequence=None):
+        with lock:
+            samples.extend(np.asarray(data).ravel())
+            if sequence is not None:
+                sequences.extend(sequence)
+
+    serial.on("data", onLine)
+    serial.on("data-block", onBlock)
+    serial.start()
+    emulator.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with lock:
+                if len(samples) >= count:
+                    break
+            time.sleep(0.01)
+    finally:
+        serial.stop()
+        emulator.stop()
+    return np.array(samples[:count]), np.array(sequences[:count], dtype=np.int64)
+
+
+def test_line_round_trip():
+    samples, _ = stream("line")
+    assert len(samples) == COUNT
+    assert samples == pytest.approx(expected(COUNT), abs=0.006)
+
+
+def test_chunked_round_trip():
+    samples, _ = stream("chunked")
+    assert len(samples) == COUNT
+    assert samples == pytest.approx(expected(COUNT), abs=0.006)
+
+
+def test_binary_round_trip():
+    samples, sequences = stream("binary", binary=True)
+    assert len(samples) == COUNT
+    assert samples == pytest.approx(expected(COUNT), abs=1e-9)
+    assert np.array_equal(sequences, np.arange(COUNT) % SAMPLE_SEQUENCE_MODULO)
@@ -0,0 +1,51 @@
+import sys
+import time
+import numpy as np
+import pytest
+
+from oscilloscope.protocol import ADC_SCALE
+from oscilloscope.serialio import Serials
+from oscilloscope.virtual import WaveformSource, virtualPty
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the emulator needs a pty pair")
+
+COUNT = 200
+
+
+def test_selector_backend_reads_every_device():
+    emulators = {
+        "lines": virtualPty(WaveformSource("sine", 1000, frequency=5), blockTime=0.005),
+        "frames": virtualPty(WaveformSource("square", 2000, frequency=20), binary=True, blockTime=0.005),
+    }
+    settings = dict(baudrate=1000000, timeout=0, reconnectDelay=0.05, portsRefreshTime=0, emitAsDict=False)
+    serials = Serials(
+        {
+            "lines": dict(port=emulators["lines"].port, mode="line", **settings),
+            "frames": dict(port=emulators["frames"].port, mode="binary", **settings),
+        },
+        backend="selector",
+    )
+    received = {"lines": [], "frames": []}
+    serials["lines"].on("data", lambda data: received["lines"].append(float(data)))
+    serials["frames"].on("data-block", lambda data: received["frames"].extend(data))
+
+    serials.startAll()
+    for emulator in emulators.values():
+        emulator.start()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and min(len(values) for values in received.values()) < COUNT:
+            time.sleep(0.01)
+        assert serials.multiplexer.thread.is_alive()
+    finally:
+        serials.stopAll()
+        for emulator in emulators.values():
+            emulator.stop()
+
+    for name, emulator in emulators.items():
+        values = np.array(received[name][:COUNT])
+        source = WaveformSource(emulator.source.kind, emulator.rate, frequency=emulator.source.frequency)
+        assert len(values) == COUNT
+        sent = np.clip(np.rint(source.read(COUNT) / ADC_SCALE), 0, 1023) * ADC_SCALE
+        assert values == pytest.approx(sent, abs=0.006)
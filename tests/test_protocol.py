@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from oscilloscope.protocol import (
+    ADC_SCALE,
+    FRAME_SAMPLES,
+    FRAME_SIZE,
+    SEQUENCE_MODULO,
+    FrameDecoder,
+    encodeFrames,
+    packCounts,
+    unpackCounts,
+)
+
+
+def counts(frames: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 1024, frames * FRAME_SAMPLES).astype(np.uint16)
+
+
+def test_pack_round_trip():
+    values = counts(16)
+    assert np.array_equal(unpackCounts(packCounts(values)).ravel(), values)
+
+
+def test_decode_round_trip():
+    values = counts(10)
+    decoder = FrameDecoder(scale=1)
+    sequence, samples = decoder.feed(encodeFrames(values, sequence=SEQUENCE_MODULO - 3))
+    assert np.array_equal(samples.ravel(), values)
+    assert list(sequence) == [65533, 65534, 65535, 0, 1, 2, 3, 4, 5, 6]
+    assert decoder.frames == 10
+    assert decoder.errors == 0 and decoder.skipped == 0
+
+
+def test_decode_scales_the_counts():
+    values = counts(2)
+    _, samples = FrameDecoder().feed(encodeFrames(values))
+    assert samples.ravel() == pytest.approx(values * ADC_SCALE)
+
+
+def test_decode_frames_split_between_reads():
+    values = counts(6)
+    raw = encodeFrames(values)
+    decoder = FrameDecoder(scale=1)
+    blocks = [decoder.feed(raw[i:i + 7])[1] for i in range(0, len(raw), 7)]
+    assert np.array_equal(np.concatenate(blocks).ravel(), values)
+    assert decoder.pending == b""
+
+
+def test_resync_after_garbage():
+    values = counts(4)
+    raw = encodeFrames(values[:16]) + b"\x00\xa5\x13\xa5\x5a\x01" + encodeFrames(values[16:], sequence=2)
+    decoder = FrameDecoder(scale=1)
+    sequence, samples = decoder.feed(raw)
+    assert np.array_equal(samples.ravel(), values)
+    assert list(sequence) == [0, 1, 2, 3]
+    assert decoder.skipped == 6
+
+
+def test_resync_after_a_corrupted_frame():
+    values = counts(3)
+    raw = bytearray(encodeFrames(values))
+    raw[FRAME_SIZE + 5] ^= 0xFF
+    decoder = FrameDecoder(scale=1)
+    sequence, samples = decoder.feed(bytes(raw))
+    assert list(sequence) == [0, 2]
+    assert np.array_equal(samples.ravel(), np.concatenate((values[:8], values[16:])))
+    assert decoder.errors == 1
+    assert decoder.skipped == FRAME_SIZE
+
+
+def test_resync_after_lost_bytes():
+    values = counts(3)
+    raw = encodeFrames(values)
+    decoder = FrameDecoder(scale=1)
+    sequence, _ = decoder.feed(raw[:FRAME_SIZE + 4] + raw[2 * FRAME_SIZE:])
+    assert list(sequence) == [0, 2]
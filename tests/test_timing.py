@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from oscilloscope.timing import RateEstimator, SampleClock
+
+
+def test_rate_estimator_fits_the_block_arrivals():
+    estimator = RateEstimator(window=2.0)
+    for k in range(50):
+        estimator.update(10, now=k * 0.01)
+    assert estimator.rate() == pytest.approx(1000, rel=1e-6)
+    assert estimator.confidence() == pytest.approx(1)
+
+
+def test_rate_estimator_is_unknown_before_three_blocks():
+    estimator = RateEstimator()
+    estimator.update(10, now=0)
+    estimator.update(10, now=0.01)
+    assert estimator.rate() == 0
+    assert estimator.confidence() == 0
+
+
+def test_rate_estimator_only_fits_the_window():
+    estimator = RateEstimator(window=1.0)
+    for k in range(100):
+        estimator.update(100, now=k * 0.01)
+    for k in range(1, 201):
+        estimator.update(1, now=1 + k * 0.01)
+    assert estimator.rate() == pytest.approx(100, rel=1e-6)
+
+
+def test_sample_clock_known_rate():
+    clock = SampleClock(sampleRate=100)
+    index = clock.indices(5)
+    assert list(index) == [0, 1, 2, 3, 4]
+    assert clock.seconds(index)[-1] == pytest.approx(0.04)
+    assert clock.nextIndex() == 5
+
+
+def test_sample_clock_reports_sequence_gaps():
+    clock = SampleClock(sampleRate=100, modulo=256)
+    lost = []
+    clock.on("dropped", lost.append)
+    clock.indices(4, sequence=[253, 254, 255, 0])
+    index = clock.indices(3, sequence=[1, 4, 5])
+    assert list(index) == [4, 7, 8]
+    assert lost == [2]
+    assert clock.dropped == 2 and clock.gaps == 1
+
+
+def test_sample_clock_estimates_the_block_rate():
+    clock = SampleClock()
+    for k in range(100):
+        clock.indices(20, now=k * 0.02)
+    assert clock.rate() == pytest.approx(1000, rel=1e-6)
+    assert clock.interval() == pytest.approx(1e-3, rel=1e-6)
+
+
+def test_sample_clock_single_samples_recover_after_a_burst():
+    clock = SampleClock(window=2.0)
+    # 2000 lines delivered at once (e.g. the OS buffer after a stall)
+    for k in range(2000):
+        clock.nextIndex(now=k * 1e-6)
+    # then the device streams at 50 Hz
+    t = 2000e-6
+    for k in range(400):
+        t += 0.02
+        clock.nextIndex(now=t)
+    assert clock.stride <= clock.maxStride
+    assert clock.rate() == pytest.approx(50, rel=0.05)
+
+
+def test_sample_clock_stride_is_bounded():
+    clock = SampleClock(maxStride=16)
+    for k in range(100000):
+        clock.nextIndex(now=k * 1e-7)
+    assert 1 <= clock.stride <= 16
+    assert len(clock.estimator.points) > 0